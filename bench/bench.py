@@ -0,0 +1,341 @@
+"""Offline benchmark of both scrapers against recorded pages on a local server.
+
+Each site runs in its own subprocess (so peak RSS is per site) against a
+``FixtureServer``; Chromium is started with host resolution disabled for
+everything but 127.0.0.1, so nothing reaches the network:
+
+* doctena: the real ``doctena.main`` loop, with ``base_url`` pointed at the
+  fixture server;
+* invisalign: ``fetch_rendered_html`` + ``parse_doctor_items`` on a
+  ``BrowserPool``, ``--concurrency`` pages at a time.
+
+Fixtures are read from ``bench/fixtures/<site>/``: ``page-<n>.html`` files
+(served as page ``n`` of the listing) and/or ``*.har`` recordings. A site
+without recorded fixtures gets synthetic pages in the site's markup.
+
+The result (pages/sec, records/sec, peak RSS, per-stage p50/p95/max) is
+JSON, so two versions can be compared with ``--baseline``::
+
+    python bench/bench.py --output bench_main.json
+    python bench/bench.py --baseline bench_main.json
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from dataclasses import replace
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS tidak dilaporkan
+    resource = None
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, ROOT_DIR)
+# Modul scraper diimpor langsung dari foldernya (invisalign butuh parsers.py di path)
+sys.path.insert(0, os.path.join(ROOT_DIR, "invisalign"))
+sys.path.insert(0, os.path.join(ROOT_DIR, "doctena"))
+
+from common.fixtures import FixtureServer, rehost  # noqa: E402
+from common.proxies import PROXIES_ENV, PROXY_FILE_ENV  # noqa: E402
+from common.timing import Timings  # noqa: E402
+
+SITES = ("doctena", "invisalign")
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+SYNTHETIC_PAGES = 10  # halaman sintetis per situs kalau tidak ada rekaman
+SYNTHETIC_PER_PAGE = 20
+BENCH_CANTON = "Vaud"  # canton yang URL-nya dipakai untuk halaman invisalign
+
+# Semua host selain server fixture tidak bisa di-resolve: benchmark tidak pernah keluar ke jaringan
+OFFLINE_ARGS = ("--host-resolver-rules=MAP * ~NOTFOUND, EXCLUDE 127.0.0.1",)
+
+FIRST_NAMES = ("Israa", "Raymond", "Claire", "Luc", "Sofia", "Marc", "Nadia", "Paul", "Elena", "Yves")
+LAST_NAMES = ("Hariri", "Beck", "Muller", "Schmit", "Weber", "Faber", "Klein", "Hoffmann", "Reuter", "Meyer")
+STREETS = ("Boulevard Royal", "Avenue de la Porte-Neuve", "Rue de Rive", "Route de Thionville",
+           "Grand-Rue", "Avenue de la Gare", "Rue du Marché", "Place de la Palud")
+CITIES = (("L-2449", "Luxembourg"), ("L-4011", "Esch-sur-Alzette"), ("1003", "Lausanne"),
+          ("1800", "Vevey"), ("1400", "Yverdon-les-Bains"))
+
+
+def fake_doctor(i: int) -> dict:
+    """Synthetic doctor ``i``; every ``i`` gets its own name, so dedup never drops one."""
+    zip_code, city = CITIES[i % len(CITIES)]
+    # Digit i // 10 -> nama belakang bersambung ("Beck-Hariri"): unik untuk semua i
+    last_name = "-".join(LAST_NAMES[int(digit)] for digit in str(i // len(FIRST_NAMES)))
+    return {
+        "name": f"DR. {FIRST_NAMES[i % len(FIRST_NAMES)]} {last_name}",
+        "street": f"{i % 120 + 1} {STREETS[i % len(STREETS)]}",
+        "zip": zip_code,
+        "city": city,
+        "tel": f"+41 21 {i % 900 + 100} {i % 90 + 10} {i % 80 + 20}",
+    }
+
+
+def doctena_page(page_number: int, per_page: int, total: int) -> str:
+    blocks = []
+    for i in range((page_number - 1) * per_page, min(page_number * per_page, total)):
+        d = fake_doctor(i)
+        blocks.append(
+            f'<div class="Search__result-infos"><h5><a href="/fr/doctor/{i}">{d["name"]}</a></h5>'
+            f'<p class="dsg-no-mg-bottom">{d["street"]},<br>{d["zip"]} {d["city"]}</p>'
+            f'<p class="Search__result-speciality"><a href="#">Orthodontiste</a></p></div>')
+    return (f"<html><head><title>Orthodontiste</title></head><body>"
+            f"<h1>{total} résultats</h1>{''.join(blocks)}</body></html>")
+
+
+def invisalign_page(page_number: int, per_page: int) -> str:
+    items = []
+    for i in range(page_number * per_page, (page_number + 1) * per_page):
+        d = fake_doctor(i)
+        items.append(
+            f'<div class="dl-results-item-container"><div class="dl-full-name">{d["name"]}</div>'
+            f'<div class="dl-info-section"><div>{d["street"]}</div><div>Cabinet {i}</div>'
+            f'<div>{d["zip"]}, {d["city"]}, Switzerland</div></div>'
+            f'<a class="dl-phone-link" href="tel:{d["tel"]}">{d["tel"]}</a>'
+            f'<div class="dl-info-url"><a href="https://example.test/{i}">site</a></div></div>')
+    return f"<html><body><div class='dl-results'>{''.join(items)}</div></body></html>"
+
+
+def load_fixtures(server: FixtureServer, site: str, directory: str, page_url) -> tuple:
+    """Register the recorded fixtures of ``site``; returns ``(page numbers, kind)``."""
+    site_dir = os.path.join(directory, site)
+    pages = []
+    for path in glob.glob(os.path.join(site_dir, "page-*.html")):
+        page_number = int(re.search(r"page-(\d+)\.html$", path).group(1))
+        server.add_file(page_url(page_number), path)
+        pages.append(page_number)
+    har_entries = server.load_dir(site_dir) if os.path.isdir(site_dir) else 0
+    kind = "recorded" if pages or har_entries else "synthetic"
+    return sorted(pages), kind
+
+
+def offline(profile):
+    return replace(profile, args=tuple(profile.args) + OFFLINE_ARGS)
+
+
+def peak_rss_mb() -> dict:
+    """Peak RSS of this process and of the largest finished child (driver, Chromium)."""
+    if resource is None:
+        return {"peak_rss_mb": None, "peak_rss_children_mb": None}
+    # ru_maxrss: kilobyte di Linux, byte di macOS
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {"peak_rss_mb": round(own / unit, 1), "peak_rss_children_mb": round(children / unit, 1)}
+
+
+async def bench_doctena(args, server: FixtureServer, workdir: str) -> dict:
+    import doctena
+
+    original_url = doctena.base_url
+    pages, kind = load_fixtures(server, "doctena", args.fixtures,
+                                lambda n: original_url.format(n))
+    if kind == "synthetic":
+        total = args.pages * args.per_page
+        for page_number in range(1, args.pages + 1):
+            server.add(original_url.format(page_number),
+                       doctena_page(page_number, args.per_page, total))
+
+    doctena.base_url = rehost(original_url, server.url)
+    doctena.STEALTH = offline(doctena.STEALTH)
+    timings_path = os.path.join(workdir, "doctena_timings.jsonl")
+    started = time.perf_counter()
+    await doctena.main(["--fresh", "--no-cache", "--retries", "1", "--timings", timings_path])
+    elapsed = time.perf_counter() - started
+
+    from common.checkpoint import CrawlState
+    records = CrawlState(doctena.STATE_FILE).rows(doctena.CRAWL_KEY)
+    with open(timings_path, encoding="utf-8") as f:
+        summary = json.loads(f.readlines()[-1])
+    pages_fetched = summary["stages"].get("goto", {}).get("count", 0)
+    return result("doctena", kind, pages_fetched, records, elapsed, summary, server)
+
+
+async def bench_invisalign(args, server: FixtureServer, workdir: str) -> dict:
+    import invisalign
+    from parsers import parse_doctor_items
+    from playwright.async_api import async_playwright
+
+    page_url = lambda n: invisalign.build_url(BENCH_CANTON, n)  # noqa: E731
+    pages, kind = load_fixtures(server, "invisalign", args.fixtures, page_url)
+    if kind == "synthetic":
+        pages = list(range(args.pages))
+        for page_number in pages:
+            server.add(page_url(page_number), invisalign_page(page_number, args.per_page))
+    if pages:
+        targets = [page_url(n) for n in pages]
+    else:
+        # Rekaman HAR saja: halaman hasil = semua dokumen HTML di bawah path find-a-doctor
+        prefix = rehost(invisalign.BASE_URL, "")
+        targets = [target for target, (_, mime, _) in server.fixtures.items()
+                   if target.startswith(prefix) and "html" in mime]
+    urls = [rehost(target, server.url) for target in targets]
+
+    timings = Timings(os.path.join(workdir, "invisalign_timings.jsonl"))
+    slots = asyncio.Semaphore(args.concurrency)
+    started = time.perf_counter()
+    async with async_playwright() as p:
+        pool = invisalign.BrowserPool(p, max_pages=args.concurrency,
+                                      rate_limiter=invisalign.DomainRateLimiter(0),
+                                      stealth=offline(invisalign.STEALTH), timings=timings)
+
+        async def fetch_and_parse(url):
+            async with slots:
+                html = await invisalign.fetch_rendered_html(url, pool)
+                with timings.span("parse", bytes=len(html)):
+                    return parse_doctor_items(html, args.parser)
+
+        await pool.start()
+        try:
+            results = await asyncio.gather(*(fetch_and_parse(url) for url in urls))
+        finally:
+            await pool.close()
+    elapsed = time.perf_counter() - started
+    summary = timings.summary()
+    timings.close(stream=sys.stderr)
+    return result("invisalign", kind, len(urls), sum(len(r) for r in results), elapsed,
+                  summary, server)
+
+
+def result(site: str, kind: str, pages: int, records: int, elapsed: float, summary: dict,
+           server: FixtureServer) -> dict:
+    return {
+        "site": site,
+        "fixtures": kind,
+        "pages": pages,
+        "records": records,
+        "elapsed_s": round(elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 2) if elapsed else None,
+        "records_per_s": round(records / elapsed, 1) if elapsed else None,
+        **peak_rss_mb(),
+        "requests": server.requests,
+        "bytes_served": server.bytes_sent,
+        "bytes_transferred": summary.get("bytes_transferred"),
+        "stages": summary.get("stages", {}),
+    }
+
+
+BENCHES = {"doctena": bench_doctena, "invisalign": bench_invisalign}
+
+
+async def run_site(args) -> dict:
+    """Benchmark one site in this process; scraper output goes to stderr."""
+    for name in (PROXIES_ENV, PROXY_FILE_ENV):
+        os.environ.pop(name, None)  # tanpa proxy: langsung ke server lokal
+    args.fixtures = os.path.abspath(args.fixtures)
+    workdir = tempfile.mkdtemp(prefix=f"bench-{args.site}-")
+    cwd = os.getcwd()
+    # doctena menulis CSV, state & session ke direktori kerja
+    os.chdir(workdir)
+    try:
+        async with FixtureServer() as server:
+            with redirect_stdout(sys.stderr):
+                return await BENCHES[args.site](args, server, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_all(args) -> dict:
+    """Run every selected site in its own subprocess and collect the results."""
+    sites = {}
+    for site in args.sites:
+        command = [sys.executable, os.path.abspath(__file__), "--site", site,
+                   "--fixtures", args.fixtures, "--pages", str(args.pages),
+                   "--per-page", str(args.per_page), "--concurrency", str(args.concurrency),
+                   "--parser", args.parser]
+        print(f"⏱️ Benchmark {site} ...", file=sys.stderr)
+        completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            sites[site] = {"site": site, "error": f"exit code {completed.returncode}"}
+            continue
+        sites[site] = json.loads(completed.stdout)
+    return {
+        "version": git_version(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parser": args.parser,
+        "concurrency": args.concurrency,
+        "sites": sites,
+    }
+
+
+def git_version() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict) -> str:
+    """Human-readable change of the headline numbers against ``baseline``."""
+    def change(new, old):
+        if not new or not old:
+            return "n/a"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    lines = [f"📊 {baseline.get('version')} -> {report.get('version')}"]
+    for site, new in report["sites"].items():
+        old = baseline.get("sites", {}).get(site)
+        if old is None or "error" in new or "error" in old:
+            continue
+        lines.append(f"   {site}: pages/s {change(new['pages_per_s'], old['pages_per_s'])}, "
+                     f"records/s {change(new['records_per_s'], old['records_per_s'])}, "
+                     f"peak RSS {change(new['peak_rss_mb'], old['peak_rss_mb'])}")
+        for stage, stats in sorted(new["stages"].items()):
+            old_stats = old.get("stages", {}).get(stage)
+            if old_stats:
+                lines.append(f"      {stage:<10} p95 {change(stats['p95_ms'], old_stats['p95_ms'])}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark both scrapers offline on recorded fixtures.")
+    parser.add_argument("--sites", nargs="+", choices=SITES, default=list(SITES))
+    parser.add_argument("--site", choices=SITES, help=argparse.SUPPRESS)  # satu subprocess
+    parser.add_argument("--fixtures", default=FIXTURES_DIR,
+                        help="directory with <site>/page-<n>.html and/or <site>/*.har")
+    parser.add_argument("--pages", type=int, default=SYNTHETIC_PAGES,
+                        help="synthetic pages per site when there are no recorded fixtures")
+    parser.add_argument("--per-page", type=int, default=SYNTHETIC_PER_PAGE)
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="invisalign pages fetched at once")
+    parser.add_argument("--parser", default="auto", help="invisalign HTML parser backend")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", metavar="FILE", help="earlier report to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.site:
+        print(json.dumps(asyncio.run(run_site(args))))
+        return
+
+    report = run_all(args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"💾 Hasil benchmark disimpan ke {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            print(compare(report, json.load(f)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
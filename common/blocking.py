@@ -0,0 +1,95 @@
+"""Resource blocking profiles for scraper browser contexts.
+
+Every request of a context goes through one ``context.route`` handler that
+aborts unwanted resource types and domains, so images, fonts, media and
+trackers never travel through the (paid) proxy. Counters are kept per run.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+ANALYTICS_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "facebook.net", "facebook.com", "hotjar.com",
+    "clarity.ms", "bat.bing.com", "linkedin.com", "adsrvr.org", "criteo.com",
+    "newrelic.com", "nr-data.net", "segment.io", "optimizely.com",
+)
+
+# Perkiraan ukuran rata-rata per tipe resource (byte) untuk menghitung bandwidth yang dihemat
+TYPICAL_SIZES = {
+    "image": 40_000, "font": 35_000, "media": 500_000, "script": 60_000,
+    "stylesheet": 25_000, "xhr": 5_000, "fetch": 5_000,
+}
+DEFAULT_SIZE = 10_000
+
+
+def _domain_matches(host: str, domains) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+@dataclass
+class BlockingProfile:
+    """Which requests a context may make."""
+
+    resource_types: frozenset = frozenset({"image", "font", "media"})
+    deny_domains: tuple = ANALYTICS_DOMAINS
+    allow_domains: tuple = ()  # selalu diteruskan, mengalahkan aturan lain
+    block_third_party: bool = False
+    first_party: tuple = ()  # domain situs, dipakai kalau block_third_party aktif
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        host = urlsplit(url).hostname or ""
+        if not host or _domain_matches(host, self.allow_domains):
+            return False
+        if resource_type in self.resource_types:
+            return True
+        if _domain_matches(host, self.deny_domains):
+            return True
+        if self.block_third_party and resource_type != "document":
+            return not _domain_matches(host, self.first_party)
+        return False
+
+
+@dataclass
+class BlockStats:
+    """Per-run request counters; ``bytes_saved`` is an estimate."""
+
+    allowed: int = 0
+    blocked: int = 0
+    bytes_saved: int = 0
+    bytes_received: int = 0
+    blocked_by_type: Counter = field(default_factory=Counter)
+
+    def record_blocked(self, resource_type: str):
+        self.blocked += 1
+        self.blocked_by_type[resource_type] += 1
+        self.bytes_saved += TYPICAL_SIZES.get(resource_type, DEFAULT_SIZE)
+
+    def record_response(self, response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            self.bytes_received += int(length)
+
+    def summary(self) -> str:
+        types = ", ".join(f"{t}={n}" for t, n in self.blocked_by_type.most_common())
+        return (f"🛡️ {self.blocked} request diblokir ({types or '-'}), "
+                f"~{self.bytes_saved / 1e6:.1f} MB dihemat; "
+                f"{self.allowed} diteruskan, {self.bytes_received / 1e6:.1f} MB diterima")
+
+
+async def apply_blocking(context, profile: BlockingProfile, stats: BlockStats = None) -> BlockStats:
+    """Install ``profile`` on every page of ``context`` and count into ``stats``."""
+    stats = stats if stats is not None else BlockStats()
+
+    async def handle(route):
+        request = route.request
+        if profile.should_block(request.url, request.resource_type):
+            stats.record_blocked(request.resource_type)
+            await route.abort("blockedbyclient")
+        else:
+            stats.allowed += 1
+            await route.fallback()
+
+    await context.route("**/*", handle)
+    context.on("response", stats.record_response)
+    return stats
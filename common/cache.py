@@ -0,0 +1,121 @@
+"""On-disk cache of fetched pages keyed by normalized URL.
+
+Entries hold whatever a scraper wants to replay later (rendered HTML, an
+API payload, the raw output of an in-page extraction) plus its content
+hash. Entries expire after ``ttl`` seconds, and the least recently used
+ones are evicted once the cache grows past ``max_bytes``. In
+``cache_only`` mode expired entries are still served and nothing is ever
+fetched, so the parsers can be re-run offline.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+
+def _sorted_params(text: str) -> str:
+    return urlencode(sorted(parse_qsl(text, keep_blank_values=True)))
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of ``url``; the fragment is kept since it carries the query on SPAs."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if parts.port and (parts.scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    fragment = parts.fragment
+    if "=" in fragment:
+        fragment = _sorted_params(fragment)
+    return urlunsplit((parts.scheme.lower(), host, parts.path or "/",
+                       _sorted_params(parts.query), fragment))
+
+
+class PageCache:
+    """URL-keyed JSON entries with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, directory: str, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES, cache_only: bool = False):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # path -> (waktu terakhir dipakai, ukuran); dibangun sekali saat start
+        self._index = {}
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                self._index[path] = (stat.st_mtime, stat.st_size)
+        self._total = sum(size for _, size in self._index.values())
+
+    def _path(self, url: str) -> str:
+        digest = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, url: str):
+        """Return the cached payload for ``url``, or None when missing or expired."""
+        path = self._path(url)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if not self.cache_only and time.time() - entry["stored_at"] > self.ttl:
+            self.misses += 1
+            return None
+        with self._lock:
+            now = time.time()
+            os.utime(path, (now, now))
+            self._index[path] = (now, self._index.get(path, (now, 0))[1])
+        self.hits += 1
+        return entry["payload"]
+
+    def put(self, url: str, payload) -> str:
+        """Store ``payload`` for ``url`` and return its content hash."""
+        body = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        entry = json.dumps({
+            "url": normalize_url(url),
+            "stored_at": time.time(),
+            "hash": digest,
+            "payload": payload,
+        }, ensure_ascii=False)
+        path = self._path(url)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(entry)
+        os.replace(tmp_path, path)
+        with self._lock:
+            _, old_size = self._index.get(path, (0, 0))
+            size = os.path.getsize(path)
+            self._index[path] = (time.time(), size)
+            self._total += size - old_size
+            self._evict()
+        return digest
+
+    def _evict(self):
+        if self._total <= self.max_bytes:
+            return
+        for path, (_, size) in sorted(self._index.items(), key=lambda item: item[1][0]):
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            del self._index[path]
+            self._total -= size
+
+    def summary(self) -> str:
+        return (f"🗄️ Cache: {self.hits} hit, {self.misses} miss, "
+                f"{len(self._index)} entri ({self._total / 1e6:.1f} MB)")
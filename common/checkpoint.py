@@ -0,0 +1,140 @@
+"""Persisted crawl progress so an interrupted crawl resumes where it stopped.
+
+Each crawl (one doctena listing, one invisalign canton, ...) has a key. For
+every page that was written to the output the state keeps its row count;
+``last_page`` is the highest page committed in order. Pages that failed for
+good are kept as dead letters (URL, error, attempts) so they can be replayed
+later. The file is replaced atomically after every change; inside a running
+event loop the write happens in a worker thread, changes made meanwhile are
+written together by the next one, and ``flush()`` waits for it.
+
+Cache-only runs keep their progress in a file of their own (``open_state``)
+and never resume, or mark done, an interrupted live crawl.
+"""
+import asyncio
+import json
+import os
+import time
+
+
+class CrawlState:
+    """JSON-backed progress of one or more paginated crawls."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.crawls = {}
+        self._dirty = False
+        self._writer = None  # task yang menulis file di thread
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.crawls = json.load(f).get("crawls", {})
+
+    def _crawl(self, key: str) -> dict:
+        return self.crawls.setdefault(key, {
+            "last_page": None, "rows": 0, "pages": {}, "done": False,
+        })
+
+    def has_unfinished(self, keys) -> bool:
+        """True when any of ``keys`` has committed pages but did not finish."""
+        return any(key in self.crawls and not self.crawls[key]["done"]
+                   and self.crawls[key]["last_page"] is not None for key in keys)
+
+    def reset(self, keys):
+        for key in keys:
+            self.crawls.pop(key, None)
+        self._changed()
+
+    def is_done(self, key: str) -> bool:
+        return self._crawl(key)["done"]
+
+    def next_page(self, key: str, first_page: int) -> int:
+        last_page = self._crawl(key)["last_page"]
+        return first_page if last_page is None else last_page + 1
+
+    def rows(self, key: str) -> int:
+        return self._crawl(key)["rows"]
+
+    def commit(self, key: str, page_number: int, records: list):
+        """Record that ``page_number`` was written with ``records``."""
+        crawl = self._crawl(key)
+        crawl["pages"][str(page_number)] = {"rows": len(records)}
+        crawl["rows"] += len(records)
+        if crawl["last_page"] is None or page_number > crawl["last_page"]:
+            crawl["last_page"] = page_number
+        crawl["updated_at"] = time.time()
+        self._changed()
+
+    def dead_letter(self, key: str, page_number: int, url: str, error: Exception,
+                    attempts: int = 1):
+        """Remember that ``page_number`` could not be fetched, for a later replay."""
+        crawl = self._crawl(key)
+        crawl.setdefault("dead", {})[str(page_number)] = {
+            "url": url, "error": f"{error.__class__.__name__}: {error}",
+            "attempts": attempts, "failed_at": time.time(),
+        }
+        self._changed()
+
+    def dead_letters(self, key: str) -> dict:
+        """``{page_number: entry}`` of the pages of ``key`` still waiting for a replay."""
+        return {int(page): entry for page, entry in self._crawl(key).get("dead", {}).items()}
+
+    def resolve(self, key: str, page_number: int):
+        self._crawl(key).get("dead", {}).pop(str(page_number), None)
+        self._changed()
+
+    def finish(self, key: str):
+        self._crawl(key)["done"] = True
+        self._changed()
+
+    def _changed(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._dirty = True
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_pending())
+
+    async def _write_pending(self):
+        while self._dirty:
+            self._dirty = False
+            # Di-serialize di event loop (dict bisa berubah), ditulis ke disk di thread
+            await asyncio.to_thread(self._write, self._dump())
+
+    async def flush(self):
+        """Wait until every change made so far is on disk."""
+        if self._writer is not None:
+            await self._writer
+
+    def save(self):
+        """Write the state now, blocking."""
+        self._write(self._dump())
+
+    def _dump(self) -> str:
+        # Tanpa indent json memakai encoder C-nya: cepat, aman dijalankan di event loop
+        return json.dumps({"crawls": self.crawls}, ensure_ascii=False)
+
+    def _write(self, text: str):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, self.path)
+
+
+def open_state(path: str, keys, cache_only: bool = False) -> CrawlState:
+    """Progress of a run over ``keys``: ``path``, or for a cache-only run a file next to it.
+
+    Raises ``RuntimeError`` for a cache-only run while a live run over ``keys``
+    is unfinished: its output would be appended to and the crawl marked done.
+    """
+    if not cache_only:
+        return CrawlState(path)
+    if CrawlState(path).has_unfinished(keys):
+        raise RuntimeError(f"{path}: crawl live belum selesai, --cache-only tidak melanjutkannya "
+                           f"(selesaikan dulu tanpa --cache-only)")
+    root, ext = os.path.splitext(path)
+    return CrawlState(f"{root}.cache-only{ext}")
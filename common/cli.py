@@ -0,0 +1,47 @@
+"""Command-line options shared by the doctena and invisalign scrapers.
+
+Each scraper builds its own ``argparse`` parser for what is specific to it
+and adds the crawl options both understand with ``add_common_args`` and
+the Parquet/SQLite outputs with ``add_output_args``.
+"""
+from .cache import DEFAULT_TTL
+from .retry import RetryPolicy
+from .stealth import HEADLESS
+
+
+def add_common_args(parser, retry: RetryPolicy):
+    """Resume, cache, proxy, retry, browser, blocking and HAR options; ``retry`` gives the default."""
+    parser.add_argument("--fresh", action="store_true",
+                        help="ignore saved progress and start again from the first page")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL,
+                        help="seconds a cached page stays fresh")
+    parser.add_argument("--cache-only", action="store_true",
+                        help="re-run the parsers on cached pages only, without any network")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--proxies", metavar="FILE",
+                        help="proxy list file (default: $SCRAPER_PROXY_FILE or $SCRAPER_PROXIES)")
+    parser.add_argument("--retries", type=int, default=retry.attempts,
+                        help="attempts per page before it is dead-lettered")
+    parser.add_argument("--replay-dead", action="store_true",
+                        help="only fetch again the pages that failed in earlier runs")
+    parser.add_argument("--headed", dest="headless", action="store_false", default=HEADLESS,
+                        help="show the browser window (debugging)")
+    parser.add_argument("--no-block", action="store_true",
+                        help="download images, fonts, trackers and consent assets too")
+    har = parser.add_mutually_exclusive_group()
+    har.add_argument("--record-har", metavar="DIR",
+                     help="record the whole crawl to HAR files in DIR (implies --fresh --no-cache)")
+    har.add_argument("--replay-har", metavar="DIR",
+                     help="serve every request from the HAR files in DIR, without network")
+
+
+def add_output_args(parser, dataset: str, db: str):
+    """--dataset/--no-parquet and --db/--no-db, defaulting to ``dataset`` and ``db``."""
+    parser.add_argument("--dataset", default=dataset, metavar="DIR",
+                        help="root of the partitioned Parquet dataset")
+    parser.add_argument("--no-parquet", dest="dataset", action="store_const", const=None,
+                        help="only write the CSV/JSONL export")
+    parser.add_argument("--db", default=db, metavar="FILE",
+                        help="SQLite doctor store shared by the scrapers")
+    parser.add_argument("--no-db", dest="db", action="store_const", const=None,
+                        help="do not write to the SQLite store")
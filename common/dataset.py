@@ -0,0 +1,164 @@
+"""Typed, compressed Parquet dataset of scraped doctors, partitioned Hive-style.
+
+Records (see ``common.schema``) land under::
+
+    <root>/source=doctena/country=Luxembourg/canton=__HIVE_DEFAULT_PARTITION__/run_date=2026-10-18/part-<run>.parquet
+
+so analytics jobs can read one source, country, canton or day with
+``pyarrow.dataset`` / pandas / DuckDB (``partitioning="hive"``) without
+re-parsing CSV. Every page is written as its own small file, atomically, so
+a crash never leaves a broken file behind and checkpoints stay truthful;
+``compact()`` merges the pieces of this run into one file per partition
+at the end. pyarrow is optional: without it ``open_dataset`` warns and the
+scrapers run without Parquet output. CSV stays available as a thin export::
+
+    python -m common.dataset dataset doctors.csv --source invisalign
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import os
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from .schema import DOCTOR_FIELDS, FIELD_NAMES
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow opsional, hanya untuk output Parquet
+    pa = None
+
+PARTITION_FIELDS = ("source", "country", "canton", "run_date")
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"  # nilai kosong, dibaca kembali sebagai null
+DEFAULT_COMPRESSION = "zstd"
+
+
+def file_schema():
+    """Arrow schema of the columns stored in the files (partition columns live in the path)."""
+    types = {"string": pa.string(), "timestamp": pa.timestamp("s", tz="UTC")}
+    return pa.schema([(name, types[kind]) for name, kind in DOCTOR_FIELDS
+                      if name not in PARTITION_FIELDS])
+
+
+def partition_path(values: dict) -> str:
+    return os.path.join(*(f"{field}={quote(values[field], safe='') if values[field] else NULL_PARTITION}"
+                          for field in PARTITION_FIELDS))
+
+
+class ParquetDataset:
+    """Writes pages of records of one ``source`` into the dataset at ``root``."""
+
+    def __init__(self, root: str, source: str, run_date: str = None,
+                 compression: str = DEFAULT_COMPRESSION):
+        if pa is None:
+            raise ImportError("output Parquet butuh paket pyarrow (atau pakai --no-parquet)")
+        self.root = root
+        self.source = source
+        self.started = datetime.now(timezone.utc).replace(microsecond=0)
+        self.run_date = run_date or self.started.strftime("%Y-%m-%d")
+        self.run_id = self.started.strftime("%Y%m%dT%H%M%S")
+        self.compression = compression
+        self.schema = file_schema()
+        self.rows_written = 0
+        self._pieces = 0
+        self._partitions = set()
+        self._lock = asyncio.Lock()
+
+    def write(self, records: list):
+        """Write ``records`` (``schema.doctor`` dicts), one file per partition they fall in."""
+        groups = {}
+        for record in records:
+            values = {"source": self.source, "country": record.get("country", ""),
+                      "canton": record.get("canton", ""), "run_date": self.run_date}
+            groups.setdefault(partition_path(values), []).append(record)
+        for partition, rows in groups.items():
+            self._pieces += 1
+            self._write_file(os.path.join(self.root, partition,
+                                          f"part-{self.run_id}-{self._pieces:05d}.parquet"), rows)
+            self._partitions.add(partition)
+        self.rows_written += len(records)
+
+    def _write_file(self, path: str, rows: list):
+        columns = {name: [row.get(name, "") for row in rows] for name in self.schema.names}
+        columns["scraped_at"] = [row.get("scraped_at") or self.started for row in rows]
+        self._write_table(path, pa.Table.from_pydict(columns, schema=self.schema))
+
+    def _write_table(self, path: str, table):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+
+    async def write_rows(self, records: list):
+        """Like ``write``, in a worker thread; batches keep their call order."""
+        if not records:
+            return
+        async with self._lock:
+            await asyncio.to_thread(self.write, records)
+
+    def compact(self):
+        """Merge the per-page pieces of this run into one file per partition."""
+        for partition in sorted(self._partitions):
+            directory = os.path.join(self.root, partition)
+            pieces = sorted(glob.glob(os.path.join(directory, f"part-{self.run_id}-*.parquet")))
+            if len(pieces) < 2:
+                continue
+            table = pa.concat_tables(pq.read_table(piece, schema=self.schema) for piece in pieces)
+            self._write_table(os.path.join(directory, f"part-{self.run_id}.parquet"), table)
+            for piece in pieces:
+                os.remove(piece)
+
+    def summary(self) -> str:
+        return (f"🗃️ {self.rows_written} dokter ke dataset Parquet {self.root} "
+                f"({len(self._partitions)} partisi, {self.compression})")
+
+
+def open_dataset(root: str, source: str):
+    """``ParquetDataset`` of ``source`` at ``root``, or ``None`` when pyarrow is missing."""
+    if pa is None:
+        print("⚠️ pyarrow tidak terpasang, output Parquet dilewati (pip install pyarrow)")
+        return None
+    return ParquetDataset(root, source)
+
+
+def read_dataset(root: str, **filters):
+    """The dataset at ``root`` as an Arrow table, e.g. ``read_dataset(root, source="doctena")``."""
+    dataset = ds.dataset(root, format="parquet", partitioning="hive")
+    expression = None
+    for field, value in filters.items():
+        condition = ds.field(field) == value
+        expression = condition if expression is None else expression & condition
+    return dataset.to_table(filter=expression)
+
+
+def export_csv(root: str, filename: str, **filters) -> int:
+    """Write the (filtered) dataset as CSV with the schema's columns; returns the row count."""
+    table = read_dataset(root, **filters)
+    columns = [name for name in FIELD_NAMES if name in table.column_names] + ["run_date"]
+    rows = table.select(columns).to_pylist()
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export the Parquet doctor dataset to CSV.")
+    parser.add_argument("root", help="dataset directory")
+    parser.add_argument("output", help="CSV file to write")
+    for field in PARTITION_FIELDS:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field, help=f"only this {field}")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    started = time.perf_counter()
+    filters = {field: getattr(args, field) for field in PARTITION_FIELDS if getattr(args, field)}
+    count = export_csv(args.root, args.output, **filters)
+    print(f"📁 {count} baris diekspor ke {args.output} ({time.perf_counter() - started:.1f} detik)")
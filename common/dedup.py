@@ -0,0 +1,127 @@
+"""Streaming deduplication of records within one run, in bounded memory.
+
+Records are identified by their stable key (see ``common.delta.record_key``)
+and only the 64-bit hash of the key is kept. Up to ``max_memory_keys``
+hashes live in a set; beyond that they are spilled to a SQLite file and
+the set starts over. A Bloom filter over the spilled hashes answers most
+"never seen" lookups without touching the disk, and a "maybe" is settled
+by the SQLite index, so no distinct doctor is ever dropped by a false
+positive.
+"""
+import hashlib
+import os
+import sqlite3
+import tempfile
+
+DEFAULT_MAX_MEMORY_KEYS = 500_000  # ~30 MB hash di memori sebelum spill ke disk
+BLOOM_BITS_PER_KEY = 10  # ~1% false positive dengan 7 hash
+BLOOM_HASHES = 7
+
+
+def key_hash(key: str) -> int:
+    """Signed 64-bit hash of ``key`` (fits a SQLite INTEGER)."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit hashes (double hashing)."""
+
+    def __init__(self, capacity: int, bits_per_key: int = BLOOM_BITS_PER_KEY,
+                 hashes: int = BLOOM_HASHES):
+        self.size = max(64, capacity * bits_per_key)
+        self.hashes = hashes
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: int):
+        value &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = value & 0xFFFFFFFF, (value >> 32) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value: int):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: int) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+
+class DedupIndex:
+    """Keys seen so far in a run; ``add`` says whether a key is new."""
+
+    def __init__(self, max_memory_keys: int = DEFAULT_MAX_MEMORY_KEYS, spill_dir: str = None):
+        self.max_memory_keys = max_memory_keys
+        self.spill_dir = spill_dir
+        self.memory = set()
+        self.bloom = None
+        self.spilled = 0
+        self.seen = 0
+        self.dropped = 0
+        self._db = None
+        self._db_path = None
+
+    def __contains__(self, key: str) -> bool:
+        return self._contains(key_hash(key))
+
+    def _contains(self, value: int) -> bool:
+        if value in self.memory:
+            return True
+        if self.bloom is None or value not in self.bloom:
+            return False
+        row = self._db.execute("SELECT 1 FROM seen WHERE h = ?", (value,)).fetchone()
+        return row is not None
+
+    def add(self, key: str) -> bool:
+        """Remember ``key``; True when it was not seen before in this run."""
+        value = key_hash(key)
+        if self._contains(value):
+            self.dropped += 1
+            return False
+        self.memory.add(value)
+        self.seen += 1
+        if len(self.memory) >= self.max_memory_keys:
+            self._spill()
+        return True
+
+    def update(self, keys):
+        """Mark ``keys`` as seen without counting them as duplicates (resume)."""
+        for key in keys:
+            value = key_hash(key)
+            if not self._contains(value):
+                self.memory.add(value)
+                self.seen += 1
+                if len(self.memory) >= self.max_memory_keys:
+                    self._spill()
+
+    def unique(self, records: list, key) -> list:
+        """``records`` without those whose ``key(record)`` was already seen."""
+        return [record for record in records if self.add(key(record))]
+
+    def _spill(self):
+        if self._db is None:
+            fd, self._db_path = tempfile.mkstemp(prefix="dedup-", suffix=".sqlite",
+                                                 dir=self.spill_dir)
+            os.close(fd)
+            self._db = sqlite3.connect(self._db_path)
+            self._db.execute("PRAGMA journal_mode=OFF")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute("CREATE TABLE IF NOT EXISTS seen (h INTEGER PRIMARY KEY) WITHOUT ROWID")
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO seen (h) VALUES (?)",
+                                 ((value,) for value in self.memory))
+        self.spilled += len(self.memory)
+        self.memory.clear()
+        # Bloom dibangun ulang sesuai jumlah hash di disk (spill jarang terjadi)
+        self.bloom = BloomFilter(self.spilled)
+        for (value,) in self._db.execute("SELECT h FROM seen"):
+            self.bloom.add(value)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+            os.remove(self._db_path)
+
+    def summary(self) -> str:
+        on_disk = f", {self.spilled} di disk" if self.spilled else ""
+        return f"🧹 {self.dropped} duplikat dibuang ({self.seen} dokter unik{on_disk})"
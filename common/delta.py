@@ -0,0 +1,180 @@
+"""Change detection between runs: emit only added, updated and removed doctors.
+
+Every record gets a stable key: its normalized name (accents, case, titles
+and punctuation dropped) plus the country and ZIP code, or the phone number
+when there is no ZIP. ``DeltaIndex`` keeps, per crawl key, the record hashes of the
+last complete run (``previous``) and of the run in progress (``current``):
+
+* a key not in ``previous`` is *added*;
+* a key whose record hash differs from ``previous`` is *updated*;
+* when the crawl completes, keys of ``previous`` not seen again are
+  *removed* (the row carries the key only), and ``current`` becomes the
+  new ``previous``.
+
+The hashes live in a SQLite file and every page is one small transaction,
+so memory stays flat and a resumed run does not take the pages of its
+first half for removals. Methods block on disk I/O; scrapers go through
+``DeltaWriter``, which calls them in a worker thread and writes the rows.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from .normalize import TITLE_PATTERN, country_code
+
+OPS = ("added", "updated", "removed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    crawl TEXT NOT NULL,
+    run TEXT NOT NULL,
+    key TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (crawl, run, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS crawls (
+    crawl TEXT PRIMARY KEY,
+    finished_at REAL
+);
+"""
+
+TITLE = re.compile(TITLE_PATTERN, re.IGNORECASE)  # gelar sama dengan normalize_frame
+
+
+def content_hash(records: list) -> str:
+    payload = json.dumps(records, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def normalize_name(name: str) -> str:
+    """``"DR. Élise  Müller-Beck"`` -> ``"ELISE MULLER BECK"``."""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = TITLE.sub("", text.strip())
+    return " ".join(re.sub(r"[^0-9A-Za-z]+", " ", text).upper().split())
+
+
+def record_key(name: str, zip_code: str = "", phone: str = "", country: str = "") -> str:
+    """Stable identity of a doctor across runs: ``"HANS MEIER|LU-2449"``."""
+    key = normalize_name(name)
+    # ZIP 2449 di Luxembourg dan di Swiss bukan tempat yang sama
+    code = country_code(country, zip_code)
+    scope = f"{code}-" if code else ""
+    zip_digits = re.sub(r"\D", "", zip_code or "")  # "L-2449" dan "2449" sama
+    if zip_digits:
+        return f"{key}|{scope}{zip_digits}"
+    phone_digits = re.sub(r"\D", "", phone or "")
+    if phone_digits:
+        # Tanpa prefiks negara/0 supaya "+41 21 ..." dan "021 ..." sama
+        return f"{key}|tel:{scope}{phone_digits[-9:]}"
+    return key
+
+
+class DeltaIndex:
+    """SQLite-backed record hashes of one or more crawls, diffed run against run."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.executescript(SCHEMA)
+        # Koneksi dipakai dari worker thread, satu per satu
+        self._lock = threading.Lock()
+
+    def begin(self, key: str, resume: bool = False):
+        """Start a run of ``key``; a resumed run keeps what it has already seen."""
+        if resume:
+            return
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM records WHERE crawl = ? AND run = 'current'", (key,))
+
+    def keys(self, key: str, run: str = "current") -> list:
+        """Record keys of the run in progress (or ``"previous"``: the last complete one)."""
+        with self._lock:
+            rows = self._db.execute("SELECT key FROM records WHERE crawl = ? AND run = ?",
+                                    (key, run))
+            return [record_id for (record_id,) in rows]
+
+    def changes(self, key: str, keyed_records: list) -> list:
+        """Delta rows for one page of ``(record key, record)`` pairs."""
+        rows = []
+        with self._lock, self._db:
+            for record_id, record in keyed_records:
+                digest = content_hash([record])
+                inserted = self._db.execute(
+                    "INSERT OR IGNORE INTO records (crawl, run, key, hash) "
+                    "VALUES (?, 'current', ?, ?)", (key, record_id, digest)).rowcount
+                if not inserted:
+                    continue  # dokter yang sama muncul lagi di halaman lain
+                old = self._db.execute(
+                    "SELECT hash FROM records WHERE crawl = ? AND run = 'previous' AND key = ?",
+                    (key, record_id)).fetchone()
+                if old is None:
+                    rows.append(delta_row("added", record_id, record))
+                elif old[0] != digest:
+                    rows.append(delta_row("updated", record_id, record))
+        return rows
+
+    def finish(self, key: str) -> list:
+        """Close a complete run of ``key``; returns the removed rows."""
+        with self._lock, self._db:
+            removed = self._db.execute(
+                """SELECT key FROM records AS p WHERE crawl = ? AND run = 'previous'
+                   AND NOT EXISTS (SELECT 1 FROM records AS c WHERE c.crawl = p.crawl
+                                   AND c.run = 'current' AND c.key = p.key)""",
+                (key,)).fetchall()
+            self._db.execute("DELETE FROM records WHERE crawl = ? AND run = 'previous'", (key,))
+            self._db.execute(
+                "UPDATE records SET run = 'previous' WHERE crawl = ? AND run = 'current'", (key,))
+            self._db.execute("INSERT OR REPLACE INTO crawls (crawl, finished_at) VALUES (?, ?)",
+                             (key, time.time()))
+        return [delta_row("removed", record_id, None) for (record_id,) in removed]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def delta_row(op: str, record_id: str, record: dict) -> dict:
+    return {"op": op, "key": record_id, "record": record}
+
+
+class DeltaWriter:
+    """Writes the delta rows of ``index`` to ``sink`` (a ``RecordSink``), off the event loop.
+
+    Without a sink (cache-only and HAR replay runs) nothing is diffed or written.
+    """
+
+    def __init__(self, index: DeltaIndex, sink=None):
+        self.index = index
+        self.sink = sink
+        self.counts = Counter()
+
+    async def changes(self, key: str, keyed_records: list):
+        await self._write(self.index.changes, key, keyed_records)
+
+    async def finish(self, key: str):
+        await self._write(self.index.finish, key)
+
+    async def _write(self, method, key: str, *method_args):
+        if self.sink is None:
+            return
+        delta_rows = await asyncio.to_thread(method, key, *method_args)
+        self.counts.update(row["op"] for row in delta_rows)
+        await self.sink.write_rows(delta_rows)
+
+    def summary(self) -> str:
+        return (f"🔁 Delta: {self.counts['added']} baru, {self.counts['updated']} berubah, "
+                f"{self.counts['removed']} hilang -> '{self.sink.filename}'")
@@ -0,0 +1,176 @@
+"""Local HTTP server for recorded pages, so scrapers can run without the network.
+
+Responses are keyed by path and query only; the host is ignored, so a
+scraper URL keeps working once its scheme and host are swapped for the
+server's (``rehost``). Browsers never send the fragment, so ``rehost``
+moves it into the query: invisalign result pages differ only in
+``#...&pr=N`` and each page still gets its own fixture. Fixtures come from HAR files (every entry with a body)
+or are added one by one. Unknown targets get a 404, which both scrapers
+already read as "past the last page"::
+
+    python -m common.fixtures bench/fixtures --port 8765
+"""
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+from urllib.parse import quote, urlsplit
+
+FRAGMENT_PARAM = "_fragment"  # fragment URL asli, dipindah ke query oleh rehost
+REASONS = {200: "OK", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+def request_target(url: str) -> str:
+    """Path plus query (and fragment, as a query parameter) of ``url``: the fixture key."""
+    parts = urlsplit(url)
+    query = parts.query
+    if parts.fragment:
+        fragment = f"{FRAGMENT_PARAM}={quote(parts.fragment, safe='')}"
+        query = f"{query}&{fragment}" if query else fragment
+    return (parts.path or "/") + (f"?{query}" if query else "")
+
+
+def rehost(url: str, base: str) -> str:
+    """``url`` with its scheme and host replaced by those of ``base``."""
+    return base.rstrip("/") + request_target(url)
+
+
+class FixtureServer:
+    """Minimal asyncio HTTP server; use as ``async with FixtureServer() as server: server.url``."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.fixtures = {}  # target -> (status, content type, body)
+        self.requests = 0
+        self.misses = 0
+        self.bytes_sent = 0
+        self.server = None
+        self._handlers = {}  # writer -> task koneksi keep-alive yang masih terbuka
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def add(self, url: str, body, status: int = 200, content_type: str = "text/html; charset=utf-8"):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.fixtures[request_target(url)] = (status, content_type, body)
+
+    def add_file(self, url: str, path: str, content_type: str = "text/html; charset=utf-8"):
+        with open(path, "rb") as f:
+            self.add(url, f.read(), content_type=content_type)
+
+    def load_har(self, path: str) -> int:
+        """Add every GET entry of the HAR at ``path`` that has a body; returns how many."""
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f).get("log", {}).get("entries", [])
+        added = 0
+        for entry in entries:
+            request, response = entry.get("request", {}), entry.get("response", {})
+            content = response.get("content", {})
+            text = content.get("text")
+            if request.get("method", "GET") != "GET" or text is None:
+                continue
+            if content.get("encoding") == "base64":
+                body = base64.b64decode(text)
+            else:
+                body = text.encode("utf-8")
+            mime = content.get("mimeType") or "application/octet-stream"
+            self.fixtures[request_target(request.get("url", "/"))] = (
+                response.get("status", 200), mime, body)
+            added += 1
+        return added
+
+    def load_dir(self, directory: str) -> int:
+        """Add the entries of every ``*.har`` under ``directory``."""
+        pattern = os.path.join(directory, "**", "*.har")
+        return sum(self.load_har(path) for path in sorted(glob.glob(pattern, recursive=True)))
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            # Tutup koneksi keep-alive; handler selesai sendiri begitu membaca EOF
+            handlers = list(self._handlers.values())
+            for writer in list(self._handlers):
+                writer.close()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self.server.wait_closed()
+            self.server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _handle(self, reader, writer):
+        self._handlers[writer] = asyncio.current_task()
+        try:
+            # Keep-alive: Chromium memakai ulang koneksi untuk beberapa request
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                request_line = head.decode("latin-1").split("\r\n", 1)[0]
+                method, target, _ = request_line.split(" ", 2)
+                self.requests += 1
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+
+                fixture = self.fixtures.get(request_target(target))
+                if method not in ("GET", "HEAD"):
+                    status, content_type, body = 405, "text/plain", b""
+                elif fixture is None:
+                    self.misses += 1
+                    status, content_type, body = 404, "text/plain", b"no fixture"
+                else:
+                    status, content_type, body = fixture
+                await self._respond(writer, status, content_type,
+                                    body if method == "GET" else b"", len(body))
+        except Exception:
+            pass  # klien memutus koneksi di tengah jalan
+        finally:
+            self._handlers.pop(writer, None)
+            writer.close()
+
+    async def _respond(self, writer, status: int, content_type: str, body: bytes, length: int):
+        reason = REASONS.get(status, "OK")
+        head = (f"HTTP/1.1 {status} {reason}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {length}\r\nCache-Control: no-store\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+        self.bytes_sent += len(body)
+
+
+async def serve(args):
+    server = FixtureServer(args.host, args.port, delay=args.delay)
+    print(f"📼 {server.load_dir(args.directory)} fixture dari {args.directory}")
+    async with server:
+        print(f"🧪 Fixture server jalan di {server.url}")
+        await asyncio.Event().wait()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve recorded HAR fixtures over local HTTP.")
+    parser.add_argument("directory", help="directory searched for *.har files")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds added to every response")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,76 @@
+"""Record a crawl to HAR once, replay it as often as needed without the network.
+
+Recording attaches ``context.route_from_har(update=True)`` to every browser
+context of a live crawl; Playwright writes the HAR (bodies embedded) when
+the context closes. Scrapers recycle and rotate contexts, so each context
+gets its own part file in the archive directory.
+
+Replaying serves every request from those parts. A request that is in none
+of them is aborted instead of going out, so a replay never touches the site
+or the proxy, and re-running extraction after a selector change costs only
+local disk reads. The scrapers skip the rate limit, the proxies, the saved
+session and the delta/store updates while replaying.
+"""
+import glob
+import os
+
+HAR_MODES = ("record", "replay")
+
+
+class HarArchive:
+    """HAR part files of one crawl in ``directory``, recorded or replayed per context."""
+
+    def __init__(self, directory: str, mode: str, name: str = "crawl"):
+        if mode not in HAR_MODES:
+            raise ValueError(f"mode HAR tidak dikenal: {mode!r} (pilih {', '.join(HAR_MODES)})")
+        self.directory = directory
+        self.mode = mode
+        self.name = name
+        self._parts = 0
+        if mode == "record":
+            os.makedirs(directory, exist_ok=True)
+            # Rekaman lama diganti seluruhnya, bukan dicampur
+            for path in self.parts():
+                os.remove(path)
+        elif not self.parts():
+            raise FileNotFoundError(f"tidak ada rekaman {name}-*.har di {directory}")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def parts(self) -> list:
+        return sorted(glob.glob(os.path.join(self.directory, f"{self.name}-*.har")))
+
+    async def attach(self, context):
+        """Record ``context`` into a new part, or serve it from all recorded parts."""
+        if self.mode == "record":
+            self._parts += 1
+            path = os.path.join(self.directory, f"{self.name}-{self._parts:04d}.har")
+            await context.route_from_har(path, update=True, update_content="embed",
+                                         update_mode="minimal")
+            return
+
+        # Route terakhir didaftarkan dicoba duluan: semua part, lalu abort kalau tidak ada
+        await context.route("**/*", _not_recorded)
+        for path in self.parts():
+            await context.route_from_har(path, not_found="fallback")
+
+    def summary(self) -> str:
+        parts = self.parts()
+        size = sum(os.path.getsize(path) for path in parts)
+        verb = "direkam ke" if self.mode == "record" else "diputar ulang dari"
+        return f"📼 {len(parts)} file HAR ({size / 1e6:.1f} MB) {verb} {self.directory}"
+
+
+def har_archive(args, name: str):
+    """HarArchive for --record-har / --replay-har (see ``common.cli``), or None for a live run."""
+    for mode in HAR_MODES:
+        directory = getattr(args, f"{mode}_har")
+        if directory:
+            return HarArchive(directory, mode, name=name)
+    return None
+
+
+async def _not_recorded(route):
+    await route.abort("failed")  # permanen: tidak dicoba ulang
@@ -0,0 +1,159 @@
+"""Local forward proxy for trying the proxy pool without a paid provider.
+
+Handles ``CONNECT`` tunnels (HTTPS) and absolute-URI HTTP requests, and can
+misbehave on purpose: ``ban_rate`` of the requests get ``ban_status``,
+``delay`` adds latency, and ``username``/``password`` require basic auth
+(``407`` otherwise)::
+
+    python -m common.mockproxy --port 8899 --ban-rate 0.2 --delay 0.5
+    SCRAPER_PROXIES="http://127.0.0.1:8899 http://127.0.0.1:8898" python invisalign/invisalign.py --canton Vaud
+"""
+import argparse
+import asyncio
+import base64
+import random
+from urllib.parse import urlsplit
+
+REASONS = {200: "OK", 403: "Forbidden", 407: "Proxy Authentication Required",
+           429: "Too Many Requests", 502: "Bad Gateway", 503: "Service Unavailable"}
+
+
+class MockProxy:
+    """Minimal asyncio HTTP proxy; use as ``async with MockProxy() as proxy: proxy.url``."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, ban_rate: float = 0.0,
+                 ban_status: int = 429, delay: float = 0.0,
+                 username: str = "", password: str = ""):
+        self.host = host
+        self.port = port
+        self.ban_rate = ban_rate
+        self.ban_status = ban_status
+        self.delay = delay
+        self.username = username
+        self.password = password
+        self.requests = 0
+        self.banned = 0
+        self.server = None
+
+    @property
+    def url(self) -> str:
+        auth = f"{self.username}:{self.password}@" if self.username else ""
+        return f"http://{auth}{self.host}:{self.port}"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _authorized(self, headers: dict) -> bool:
+        if not self.username:
+            return True
+        token = base64.b64encode(f"{self.username}:{self.password}".encode()).decode()
+        return headers.get("proxy-authorization", "") == f"Basic {token}"
+
+    async def _handle(self, reader, writer):
+        upstream = None
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            request_line, *header_lines = head.decode("latin-1").split("\r\n")
+            method, target, version = request_line.split(" ", 2)
+            headers = {}
+            for line in header_lines:
+                if ":" in line:
+                    name, value = line.split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+            self.requests += 1
+
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            if not self._authorized(headers):
+                await self._reply(writer, 407, {"Proxy-Authenticate": 'Basic realm="mock"'})
+                return
+            if random.random() < self.ban_rate:
+                self.banned += 1
+                await self._reply(writer, self.ban_status)
+                return
+
+            if method == "CONNECT":
+                host, _, port = target.rpartition(":")
+                upstream = await asyncio.open_connection(host, int(port))
+                await self._reply(writer, 200, keep_open=True)
+            else:
+                parts = urlsplit(target)
+                path = parts.path or "/"
+                if parts.query:
+                    path += "?" + parts.query
+                upstream = await asyncio.open_connection(parts.hostname, parts.port or 80)
+                kept = [line for line in header_lines if line and not line.lower().startswith(
+                    ("proxy-", "connection:", "keep-alive:"))]
+                forwarded = "\r\n".join([f"{method} {path} {version}", *kept, "Connection: close"])
+                upstream[1].write(forwarded.encode("latin-1") + b"\r\n\r\n")
+            await self._pipe(reader, writer, *upstream)
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            if upstream is None and not writer.is_closing():
+                await self._reply(writer, 502, body=str(e))
+        finally:
+            writer.close()
+
+    async def _reply(self, writer, status: int, headers: dict = None, body: str = "",
+                     keep_open: bool = False):
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        if not keep_open:
+            lines += [f"Content-Length: {len(body.encode())}", "Connection: close"]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n" + body).encode("latin-1", "replace"))
+        await writer.drain()
+
+    async def _pipe(self, client_reader, client_writer, upstream_reader, upstream_writer):
+        async def copy(reader, writer):
+            try:
+                while data := await reader.read(65536):
+                    writer.write(data)
+                    await writer.drain()
+            except OSError:
+                pass
+            finally:
+                writer.close()
+
+        await asyncio.gather(copy(client_reader, upstream_writer),
+                             copy(upstream_reader, client_writer))
+
+
+async def serve(args):
+    async with MockProxy(args.host, args.port, args.ban_rate, args.ban_status, args.delay,
+                         args.username, args.password) as proxy:
+        print(f"🧪 Mock proxy jalan di {proxy.url}")
+        await asyncio.Event().wait()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local misbehaving HTTP proxy.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--ban-rate", type=float, default=0.0,
+                        help="fraction of requests answered with --ban-status")
+    parser.add_argument("--ban-status", type=int, default=429)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--username", default="")
+    parser.add_argument("--password", default="")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,157 @@
+"""Batch normalization of scraped doctor records with vectorized string operations.
+
+Both scrapers hand over a whole page (or run) as one DataFrame with the
+columns ``name``, ``address``, ``zip``, ``city``, ``country`` and ``tel``;
+``normalize_frame`` adds the cleaned fields in a handful of columnar
+``.str`` passes instead of per-row Python:
+
+* names are split into ``title`` ("DR.", "Prof."), ``first_name`` and
+  ``last_name`` (everything after the first word);
+* address segments separated by commas or line breaks are collapsed, so a
+  segment the site repeats ("2ème étage, 2ème étage") appears once;
+* when the record has no ZIP yet, ``street``/``zip``/``city``/``country``
+  are parsed from the address ("L-2449 Luxembourg", "1003, Lausanne,
+  Switzerland"); a country prefix stays on the ZIP ("L - 4371" -> "L-4371");
+* phone numbers become ``+<country code><digits>``.
+
+Columns use the Arrow string dtype when pyarrow is installed.
+"""
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:  # pyarrow opsional
+    STRING_DTYPE = "string"
+
+COLUMNS = ("name", "address", "zip", "city", "country", "tel")
+
+# Gelar di depan nama: "DR.", "Dre", "Prof.", "Dr. med. dent.", "Mrs" ...
+TITLE_PATTERN = r"^(?:(?:dr|dre|drs|prof|pr|med|dent|mme|mr|mrs|m)\b\.?\s*)+"
+SEGMENT_SEPARATOR = r"\s*[,;\n]\s*"
+# [jalan, ]ZIP kota[, sisa] - ZIP boleh diawali kode negara ("L-2449", "L - 4371") dan diikuti koma
+LOCALITY_PATTERN = (r"^(?:(?P<street>.*?)\s*,\s*)?(?P<zip>(?:[A-Za-z]{1,2}\s*-\s*)?\d{4,5})"
+                    r"(?:\s*,\s*|\s+)(?P<city>[^,\d][^,]*?)(?:\s*,\s*(?P<rest>.*))?$")
+
+COUNTRIES = {
+    "luxembourg": "Luxembourg", "luxemburg": "Luxembourg", "lu": "Luxembourg",
+    "switzerland": "Switzerland", "suisse": "Switzerland", "schweiz": "Switzerland",
+    "svizzera": "Switzerland", "ch": "Switzerland",
+}
+CALLING_CODES = {"Luxembourg": "352", "Switzerland": "41"}
+COUNTRY_CODES = {"Luxembourg": "LU", "Switzerland": "CH"}
+ZIP_PREFIXES = {"L": "Luxembourg", "LU": "Luxembourg", "CH": "Switzerland"}  # "L-2449"
+
+
+def country_code(country: str = "", zip_code: str = "") -> str:
+    """``"LU"``/``"CH"`` from the country name, else from the ZIP prefix; ``""`` if unknown."""
+    country = (country or "").strip()
+    name = COUNTRIES.get(country.lower(), country)
+    if not name and "-" in (zip_code or ""):
+        name = ZIP_PREFIXES.get(zip_code.split("-", 1)[0].strip().upper(), "")
+    return COUNTRY_CODES.get(name, "")
+
+
+def clean_text(values) -> pd.Series:
+    """Strings with runs of whitespace collapsed and missing values as ``""``."""
+    series = pd.Series(values, dtype=STRING_DTYPE).fillna("")
+    return series.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def split_names(names: pd.Series) -> pd.DataFrame:
+    names = clean_text(names)
+    title = names.str.extract(f"(?i)({TITLE_PATTERN})", expand=False).fillna("").str.strip()
+    bare = names.str.replace(f"(?i){TITLE_PATTERN}", "", regex=True).str.strip()
+    parts = bare.str.split(" ", n=1, expand=True).reindex(columns=[0, 1])
+    return pd.DataFrame({
+        "name": names,
+        "title": title,
+        "first_name": clean_text(parts[0]),
+        "last_name": clean_text(parts[1]),
+    }, index=names.index)
+
+
+def collapse_segments(addresses: pd.Series) -> pd.Series:
+    """Comma/newline separated segments, each kept once (case-insensitive), joined by ", "."""
+    addresses = pd.Series(addresses, dtype=STRING_DTYPE).fillna("")
+    segments = addresses.str.split(SEGMENT_SEPARATOR, regex=True).explode()
+    segments = clean_text(segments).set_axis(segments.index)
+    segments = segments[segments != ""]
+    repeated = pd.DataFrame({"row": segments.index, "segment": segments.str.lower().to_numpy()}).duplicated()
+    joined = segments[~repeated.to_numpy()].groupby(level=0).agg(", ".join)
+    return joined.reindex(addresses.index, fill_value="").astype(STRING_DTYPE)
+
+
+def normalize_zips(zips) -> pd.Series:
+    """``"l - 4371"`` -> ``"L-4371"``; ZIPs without a country prefix keep their digits only."""
+    zips = clean_text(zips).str.upper().str.replace(r"\s*-\s*", "-", regex=True)
+    prefixed = zips.str.fullmatch(r"[A-Z]{1,2}-\d+")
+    return zips.where(prefixed, zips.str.replace(r"\D", "", regex=True))
+
+
+def canonical_country(countries: pd.Series) -> pd.Series:
+    countries = clean_text(countries)
+    return countries.str.lower().map(COUNTRIES).fillna(countries).astype(STRING_DTYPE)
+
+
+def parse_locality(addresses: pd.Series, default_country: str = "") -> pd.DataFrame:
+    """Split collapsed addresses into ``street``, ``zip``, ``city`` and ``country``."""
+    found = addresses.str.extract(LOCALITY_PATTERN)
+    matched = found["zip"].notna()
+    rest = clean_text(found["rest"])
+    country = rest.str.lower().map(COUNTRIES)
+    # Sisa setelah kota yang bukan nama negara tetap bagian dari alamat jalan
+    extra = rest.where(country.isna() & (rest != ""), "")
+    street = join_nonempty(clean_text(found["street"]), extra)
+    return pd.DataFrame({
+        "street": street.where(matched, addresses),
+        "zip": normalize_zips(found["zip"]),
+        "city": clean_text(found["city"]),
+        "country": country.fillna(default_country).astype(STRING_DTYPE),
+    }, index=addresses.index)
+
+
+def normalize_phones(phones: pd.Series, countries: pd.Series) -> pd.Series:
+    """``"021 555 12 34"`` / ``"+41 (0)21 555 12 34"`` -> ``"+41215551234"``."""
+    digits = clean_text(phones).str.replace(r"\(0\)", "", regex=True)
+    digits = digits.str.replace(r"[^\d+]", "", regex=True).str.replace(r"^00", "+", regex=True)
+    calling_code = clean_text(countries).map(CALLING_CODES).fillna("").astype(STRING_DTYPE)
+    national = "+" + calling_code + digits.str.replace(r"^0", "", regex=True)
+    keep = digits.str.startswith("+") | (digits == "") | (calling_code == "")
+    return digits.where(keep, national)
+
+
+def join_nonempty(*columns: pd.Series, sep: str = ", ") -> pd.Series:
+    joined = columns[0]
+    for column in columns[1:]:
+        joined = joined + sep + column
+    # Separator dari kolom kosong dibuang
+    escaped = "".join(f"\\{ch}" if not ch.isalnum() and ch != " " else ch for ch in sep)
+    joined = joined.str.replace(f"(?:{escaped}){{2,}}", sep, regex=True)
+    return joined.str.replace(f"^(?:{escaped})+|(?:{escaped})+$", "", regex=True)
+
+
+def normalize_frame(frame: pd.DataFrame, default_country: str = "") -> pd.DataFrame:
+    """Normalized view of ``frame`` (see module docstring); index is kept."""
+    raw = {column: clean_text(frame[column]) if column in frame else clean_text([""] * len(frame))
+           for column in COLUMNS}
+    raw = {column: values.set_axis(frame.index) for column, values in raw.items()}
+    # Alamat mentah: baris baru masih jadi pemisah segmen sebelum spasi dirapikan
+    address = collapse_segments(frame["address"] if "address" in frame else raw["address"])
+    parsed = parse_locality(address, default_country)
+
+    # Record yang ZIP-nya sudah terstruktur (API) hanya dibersihkan
+    given_zip = normalize_zips(raw["zip"])
+    structured = given_zip.str.contains(r"\d", regex=True)
+    given_country = canonical_country(raw["country"])
+    country = given_country.where(given_country != "", parsed["country"])
+
+    out = split_names(raw["name"])
+    out["street"] = address.where(structured, parsed["street"])
+    out["zip"] = given_zip.where(structured, parsed["zip"])
+    out["city"] = raw["city"].where(structured, parsed["city"])
+    out["country"] = country
+    out["tel"] = normalize_phones(raw["tel"], country)
+    locality = (out["zip"] + " " + out["city"]).str.strip()
+    out["full_address"] = join_nonempty(out["street"], locality, out["country"])
+    return out
@@ -0,0 +1,90 @@
+"""Know the last page up front from the result count a site reports.
+
+Search APIs usually return a total next to the items, and listings show it
+in a count element ("123 résultats"). With that number and the page size
+the exact page set can be scheduled, so no trailing empty page has to be
+fetched. The count is only read from that field or element, never from the
+whole page, and a count the rows contradict is dropped: the first empty
+page remains what really ends a crawl.
+"""
+import math
+import re
+
+# "123 résultats", "1 234 praticiens", "1'234 results" (spasi/apostrof/titik pemisah ribuan)
+TOTAL_PATTERN = re.compile(
+    r"(?<![\d.,])(\d{1,3}(?:[ '’  .,]\d{3})+|\d+)\s*"
+    r"(?:résultats?|results?|praticiens?|orthodontistes?|dentistes?|docteurs?|doctors?|médecins?)\b",
+    re.IGNORECASE,
+)
+
+# Nama field total di payload API (dicocokkan tanpa huruf besar/kecil dan tanpa _)
+TOTAL_KEYS = ("totalresults", "totalcount", "totalrecords", "totalhits", "totalitems",
+              "numfound", "resultcount", "total")
+
+
+def total_from_text(text: str):
+    """Result count in ``text`` (the text of a count element), or None."""
+    match = TOTAL_PATTERN.search(text or "")
+    if not match:
+        return None
+    return int(re.sub(r"\D", "", match.group(1)))
+
+
+def total_from_payload(payload, depth: int = 2):
+    """Total result count of a search API payload, looking ``depth`` levels deep."""
+    if not isinstance(payload, dict):
+        return None
+    keys = {key.lower().replace("_", ""): value for key, value in payload.items()}
+    for name in TOTAL_KEYS:
+        value = keys.get(name)
+        if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+            return value
+    if depth > 0:
+        # Biasanya di bawah "meta", "pagination", "paging", ...
+        for value in payload.values():
+            total = total_from_payload(value, depth - 1)
+            if total is not None:
+                return total
+    return None
+
+
+class PageBound:
+    """Last page of a crawl, worked out from a reported total and the page sizes seen.
+
+    The page size is the largest page seen so far, which can only be smaller
+    than the real one, so the bound errs towards one page too many. A total
+    smaller than the rows already seen is ignored, and a total the pages
+    outgrow later is dropped again (``end`` goes back to None), so the
+    scrapers only use the bound to stop scheduling pages, not to discard any.
+    """
+
+    def __init__(self, first_page: int = 0):
+        self.first_page = first_page
+        self.total = None
+        self.page_size = 0
+        self.rows = 0
+        self.ignored = None  # total terakhir yang tidak cocok dengan baris yang diambil
+
+    def observe(self, records: list, total=None):
+        """Feed one fetched page; returns the current end page (exclusive) or None."""
+        self.page_size = max(self.page_size, len(records))
+        self.rows += len(records)
+        if total is not None:
+            if total < self.rows:
+                if total != self.ignored:
+                    print(f"⚠️ Jumlah hasil {total} lebih kecil dari {self.rows} baris yang "
+                          f"sudah diambil, diabaikan")
+                self.ignored = total
+            else:
+                self.total = total
+        if self.total is not None and self.rows > self.total:
+            print(f"⚠️ Sudah {self.rows} baris, lebih dari jumlah hasil {self.total}: "
+                  f"batas halaman dibuang")
+            self.ignored, self.total = self.total, None
+        return self.end
+
+    @property
+    def end(self):
+        if self.total is None or not self.page_size:
+            return None
+        return self.first_page + math.ceil(self.total / self.page_size)
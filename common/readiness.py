@@ -0,0 +1,192 @@
+"""Event-driven readiness waits shared by the doctena and invisalign scrapers.
+
+Instead of fixed ``wait_for_timeout`` sleeps a page is considered ready as
+soon as its results are on screen: the watched XHR/fetch endpoints went
+idle and the number of result elements stopped changing. Dialogs (modals,
+cookie banners) that are on screen by then are dismissed first. Zero
+results only count as an empty page once the site's "no results" marker
+showed up or a watched endpoint answered; until then the page raises
+``PageNotReady`` and is retried.
+"""
+import asyncio
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+
+from .retry import PageNotReady
+
+DIALOG_CLICK_TIMEOUT_MS = 2000
+
+# Dievaluasi berulang di browser oleh wait_for_function; state disimpan di window
+_STABLE_COUNT_JS = """
+([selector, settleMs, emptySelector, emptyGraceMs]) => {
+    const now = performance.now();
+    const count = document.querySelectorAll(selector).length;
+    const states = window.__scraperReady || (window.__scraperReady = {});
+    const state = states[selector];
+    if (!state || state.count !== count) {
+        states[selector] = {count: count, since: now};
+        return false;
+    }
+    const stableFor = now - state.since;
+    if (count > 0) {
+        return stableFor >= settleMs ? {count: count} : false;
+    }
+    if (emptySelector && document.querySelector(emptySelector)) {
+        return {count: 0, empty: true};
+    }
+    return document.readyState === "complete" && stableFor >= emptyGraceMs ? {count: 0} : false;
+}
+"""
+
+
+@dataclass
+class Readiness:
+    """Readiness strategy of one site."""
+
+    results_selector: str
+    settle_ms: int = 400  # jumlah hasil harus tetap sama selama ini
+    timeout_ms: int = 15000
+    empty_selector: str = None  # penanda "tidak ada hasil" kalau situs punya
+    empty_grace_ms: int = 3000  # tanpa penanda, 0 hasil baru dipercaya setelah ini
+    # ... dan hanya kalau salah satu endpoint sudah menjawab
+    endpoints: tuple = ()  # potongan URL XHR/fetch yang harus idle dulu
+    endpoint_idle_ms: int = 300
+    dialogs: dict = field(default_factory=dict)  # overlay selector -> tombol yang diklik
+
+
+class EndpointTracker:
+    """Counts in-flight XHR/fetch requests whose URL contains one of ``patterns``."""
+
+    def __init__(self, page, patterns: tuple):
+        self.patterns = patterns
+        self.in_flight = 0
+        self.finished = 0  # request yang selesai dengan respons (bukan gagal)
+        self.last_activity = time.monotonic()
+        self._changed = asyncio.Event()
+        if patterns:
+            page.on("request", self._on_request)
+            page.on("requestfinished", self._on_finished)
+            page.on("requestfailed", self._on_done)
+
+    def _matches(self, request) -> bool:
+        if request.resource_type not in ("xhr", "fetch"):
+            return False
+        return any(pattern in request.url for pattern in self.patterns)
+
+    def _on_request(self, request):
+        if self._matches(request):
+            self.in_flight += 1
+            self._touch()
+
+    def _on_finished(self, request):
+        if self._matches(request):
+            self.finished += 1
+        self._on_done(request)
+
+    def _on_done(self, request):
+        if self._matches(request):
+            self.in_flight = max(0, self.in_flight - 1)
+            self._touch()
+
+    def _touch(self):
+        self.last_activity = time.monotonic()
+        self._changed.set()
+
+    async def wait_answered(self, timeout_ms: int):
+        """Return once a matching request finished with a response."""
+        deadline = time.monotonic() + timeout_ms / 1000
+        while not self.finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"endpoints {self.patterns} not answered after "
+                                           f"{timeout_ms} ms")
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def wait_idle(self, idle_ms: int, timeout_ms: int):
+        """Return once no matching request was running for ``idle_ms``."""
+        if not self.patterns:
+            return
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            quiet_for = time.monotonic() - self.last_activity
+            if self.in_flight == 0 and quiet_for >= idle_ms / 1000:
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"endpoints {self.patterns} not idle after {timeout_ms} ms")
+            self._changed.clear()
+            wait = remaining if self.in_flight else min(remaining, idle_ms / 1000 - quiet_for)
+            try:
+                await asyncio.wait_for(self._changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def dismiss_dialogs(page, dialogs: dict, timings=None) -> int:
+    """Click the button of every overlay currently visible; returns how many were closed.
+
+    With ``timings`` (a ``common.timing.Timings``) every dismissal is timed.
+    """
+    dismissed = 0
+    for overlay, button in dialogs.items():
+        if not await page.locator(overlay).first.is_visible():
+            continue
+        with timings.span("dialog", button=button) if timings is not None else nullcontext():
+            try:
+                await page.locator(button).first.click(timeout=DIALOG_CLICK_TIMEOUT_MS)
+            except Exception as e:  # overlay bisa hilang sendiri di antara cek & klik
+                print(f"⚠️ Dialog {overlay} tidak bisa ditutup: {e}")
+                continue
+        dismissed += 1
+    return dismissed
+
+
+async def prepare_page(page, strategy: Readiness) -> EndpointTracker:
+    """Start endpoint tracking; call before ``goto``."""
+    return EndpointTracker(page, strategy.endpoints)
+
+
+async def wait_for_stable_count(page, strategy: Readiness) -> dict:
+    """Wait until the number of result elements stops changing.
+
+    Returns ``{"count": n}``, with ``"empty": True`` when the "no results"
+    marker was seen.
+    """
+    handle = await page.wait_for_function(
+        _STABLE_COUNT_JS,
+        arg=[strategy.results_selector, strategy.settle_ms,
+             strategy.empty_selector, strategy.empty_grace_ms],
+        polling=100,
+        timeout=strategy.timeout_ms,
+    )
+    return await handle.json_value()
+
+
+async def wait_until_ready(page, strategy: Readiness, tracker: EndpointTracker = None,
+                           timings=None) -> int:
+    """Wait for the endpoints to go idle, close open dialogs, then for a stable result count.
+
+    Raises ``PageNotReady`` for 0 results while no watched endpoint has
+    answered yet: right after a ``commit`` navigation that is a slow API, not
+    the page after the last one.
+    """
+    if tracker is not None:
+        await tracker.wait_idle(strategy.endpoint_idle_ms, strategy.timeout_ms)
+    if strategy.dialogs:
+        await dismiss_dialogs(page, strategy.dialogs, timings)
+    state = await wait_for_stable_count(page, strategy)
+    if state["count"] or state.get("empty") or tracker is None or not tracker.patterns:
+        return state["count"]
+    if not tracker.finished:
+        try:
+            await tracker.wait_answered(strategy.timeout_ms)
+        except asyncio.TimeoutError as e:
+            raise PageNotReady(f"0 hasil dan endpoint {tracker.patterns} belum menjawab") from e
+        await tracker.wait_idle(strategy.endpoint_idle_ms, strategy.timeout_ms)
+        state = await wait_for_stable_count(page, strategy)
+    return state["count"]
@@ -0,0 +1,93 @@
+"""Retry policy for page fetches: exponential backoff with full jitter.
+
+Errors are split into transient ones (timeouts, dropped connections, bans,
+5xx, results that never rendered), which are retried, and permanent ones
+(4xx, parsing bugs), which are not. Each page gets ``attempts`` tries; a page
+that still fails raises ``PageFailed`` so the crawl can dead-letter it and
+move on instead of stopping.
+"""
+import asyncio
+import random
+from dataclasses import dataclass
+
+from .proxies import ProxyBanned, is_proxy_error
+
+# Error jaringan Chromium yang biasanya hilang kalau dicoba lagi
+TRANSIENT_NET_ERRORS = (
+    "ERR_CONNECTION_RESET", "ERR_CONNECTION_CLOSED", "ERR_CONNECTION_REFUSED",
+    "ERR_CONNECTION_TIMED_OUT", "ERR_TIMED_OUT", "ERR_EMPTY_RESPONSE",
+    "ERR_NETWORK_CHANGED", "ERR_INTERNET_DISCONNECTED", "ERR_NAME_NOT_RESOLVED",
+    "ERR_HTTP2_PROTOCOL_ERROR", "ERR_ADDRESS_UNREACHABLE", "ERR_SSL_PROTOCOL_ERROR",
+)
+
+
+class PageNotReady(Exception):
+    """Neither results nor an empty state showed up in time."""
+
+
+class HTTPStatusError(Exception):
+    """The document came back with an error status."""
+
+    def __init__(self, status: int, url: str = ""):
+        super().__init__(f"HTTP {status} dari {url or 'situs'}")
+        self.status = status
+
+    @property
+    def transient(self) -> bool:
+        return self.status >= 500 or self.status == 408
+
+
+class PageFailed(Exception):
+    """A page still failed after its retry budget (or with a permanent error)."""
+
+    def __init__(self, label: str, error: Exception, attempts: int):
+        super().__init__(f"{label}: {error.__class__.__name__}: {error} "
+                         f"(setelah {attempts} percobaan)")
+        self.error = error
+        self.attempts = attempts
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, (PageNotReady, ProxyBanned, ConnectionError)):
+        return True
+    if isinstance(error, HTTPStatusError):
+        return error.transient
+    # asyncio.TimeoutError dan TimeoutError Playwright (namanya sama, bukan turunan)
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)) or type(error).__name__ == "TimeoutError":
+        return True
+    message = str(error)
+    return is_proxy_error(error) or any(code in message for code in TRANSIENT_NET_ERRORS)
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently one page is retried."""
+
+    attempts: int = 4  # per halaman, termasuk percobaan pertama
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+
+    def backoff(self, failures: int) -> float:
+        """Full-jitter delay after ``failures`` failed attempts."""
+        cap = min(self.max_delay, self.base_delay * self.multiplier ** (failures - 1))
+        return random.uniform(0, cap)
+
+    async def call(self, fn, *args, label: str = "", on_error=None):
+        """Await ``fn(*args)`` until it succeeds or the budget is spent.
+
+        ``on_error(error)`` runs after every failure, before the backoff
+        (e.g. to rotate a proxy). Raises ``PageFailed``.
+        """
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return await fn(*args)
+            except Exception as e:
+                if on_error is not None:
+                    await on_error(e)
+                if not is_transient(e) or attempt == self.attempts:
+                    raise PageFailed(label, e, attempt) from e
+                delay = self.backoff(attempt)
+                print(f"🔁 {label}: {e.__class__.__name__}, coba lagi "
+                      f"({attempt + 1}/{self.attempts}) dalam {delay:.1f} detik")
+                await asyncio.sleep(delay)
@@ -0,0 +1,35 @@
+"""Record schema shared by both scrapers' columnar and database outputs.
+
+Each source maps its own records (doctena CSV rows, invisalign records) to
+``DOCTOR_FIELDS`` with ``doctor()``, so the Parquet dataset and the SQLite
+store hold the same columns for every source.
+"""
+DOCTOR_FIELDS = (
+    ("source", "string"),
+    ("name", "string"),
+    ("title", "string"),
+    ("first_name", "string"),
+    ("last_name", "string"),
+    ("street", "string"),
+    ("zip", "string"),
+    ("city", "string"),
+    ("country", "string"),
+    ("canton", "string"),
+    ("tel", "string"),
+    ("site", "string"),
+    ("speciality", "string"),
+    ("full_address", "string"),
+    ("scraped_at", "timestamp"),
+)
+FIELD_NAMES = tuple(name for name, _ in DOCTOR_FIELDS)
+
+
+def doctor(source: str, **fields) -> dict:
+    """Record of ``source`` with every string field present (``""`` when unknown)."""
+    unknown = set(fields) - set(FIELD_NAMES)
+    if unknown:
+        raise ValueError(f"field tidak dikenal: {', '.join(sorted(unknown))}")
+    record = {name: "" for name, kind in DOCTOR_FIELDS if kind == "string"}
+    record.update({name: "" if value is None else value for name, value in fields.items()})
+    record["source"] = source
+    return record
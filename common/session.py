@@ -0,0 +1,57 @@
+"""Warm browser sessions kept as a small storage-state file instead of a profile dir.
+
+A full Chromium profile (``user_data``) weighs megabytes of caches, crash
+reports and history, and only one browser can use it at a time. What makes
+a session "warm" is just the cookies (consent, anti-bot tokens) and the
+localStorage of the site. ``SessionStore`` saves only those, filtered to the
+site's domains, and any number of ephemeral contexts can start from it via
+``new_context(storage_state=...)``.
+"""
+import json
+import os
+
+
+def _host_matches(host: str, domains) -> bool:
+    host = host.lstrip(".").lower()
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class SessionStore:
+    """JSON storage state at ``path``, limited to cookies/localStorage of ``domains``."""
+
+    def __init__(self, path: str, domains: tuple = ()):
+        self.path = path
+        self.domains = domains
+
+    def load(self):
+        """Storage state dict for ``new_context``, or None when there is none yet."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def filter(self, state: dict) -> dict:
+        cookies = state.get("cookies", [])
+        origins = state.get("origins", [])
+        if self.domains:
+            cookies = [c for c in cookies if _host_matches(c.get("domain", ""), self.domains)]
+            origins = [o for o in origins
+                       if _host_matches(o.get("origin", "").split("://")[-1].split(":")[0],
+                                        self.domains)]
+        return {"cookies": cookies, "origins": origins}
+
+    def write(self, state: dict) -> dict:
+        state = self.filter(state)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return state
+
+    async def save(self, context) -> dict:
+        """Snapshot ``context`` and keep what matters; returns the saved state."""
+        return self.write(await context.storage_state())
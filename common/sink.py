@@ -0,0 +1,75 @@
+"""Streaming record writers: rows are appended and flushed page by page.
+
+Nothing is accumulated in memory, and a crash only loses the page that was
+being scraped. The file I/O itself runs in a worker thread so the Playwright
+event loop keeps driving the browser meanwhile.
+"""
+import asyncio
+import csv
+import json
+import os
+
+
+class RecordSink:
+    """Append-only CSV or JSONL writer.
+
+    The format follows the file extension unless ``fmt`` is given. With
+    ``append`` an existing file is continued (the CSV header is only written
+    to an empty file); otherwise the file is truncated on open.
+    """
+
+    def __init__(self, filename: str, fieldnames: list = None, fmt: str = None,
+                 append: bool = False):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.fmt = fmt or ("jsonl" if filename.endswith((".jsonl", ".ndjson")) else "csv")
+        if self.fmt == "csv" and not fieldnames:
+            raise ValueError("fieldnames wajib untuk output CSV")
+        self.append = append
+        self.rows_written = 0
+        self._file = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    def open(self):
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        is_new = not self.append or not os.path.exists(self.filename) \
+            or os.path.getsize(self.filename) == 0
+        self._file = open(self.filename, mode="a" if self.append else "w",
+                          newline="", encoding="utf-8")
+        if self.fmt == "csv":
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            if is_new:
+                self._writer.writeheader()
+                self._file.flush()
+        return self
+
+    def _write(self, rows: list):
+        if self.fmt == "csv":
+            self._writer.writerows(rows)
+        else:
+            self._file.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    async def write_rows(self, rows: list):
+        """Append ``rows`` and flush them to disk; batches keep their call order."""
+        if not rows:
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._write, rows)
+            self.rows_written += len(rows)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def __aenter__(self):
+        await asyncio.to_thread(self.open)
+        return self
+
+    async def __aexit__(self, *exc):
+        await asyncio.to_thread(self.close)
@@ -0,0 +1,102 @@
+"""Stealth profile so headless Chromium looks like the headed browser we used to run.
+
+Headless Chromium gives itself away in a few places: ``HeadlessChrome`` in
+the user agent and client hints, ``navigator.webdriver``, an empty plugin
+list, no ``window.chrome``, a small default viewport and an inconsistent
+``Notification`` permission. The profile fixes those with launch flags,
+context options and an init script that runs before any page script.
+"""
+import re
+from dataclasses import dataclass, field
+
+HEADLESS = True  # produksi; --headed untuk debugging
+
+STEALTH_ARGS = (
+    "--disable-blink-features=AutomationControlled",
+    "--no-default-browser-check",
+    "--no-first-run",
+)
+
+# Dijalankan di setiap frame sebelum script situs
+STEALTH_INIT_JS = """
+(() => {
+    const define = (obj, prop, value) => {
+        try { Object.defineProperty(obj, prop, {get: () => value, configurable: true}); } catch (e) {}
+    };
+    define(Navigator.prototype, "webdriver", undefined);
+    define(navigator, "languages", %(languages)s);
+    if (!navigator.plugins.length) {
+        define(navigator, "plugins", [1, 2, 3, 4, 5].map((i) => ({name: "PDF Viewer " + i})));
+    }
+    const ua = navigator.userAgent.replace("HeadlessChrome", "Chrome");
+    define(navigator, "userAgent", ua);
+    define(navigator, "appVersion", ua.replace(/^Mozilla\\//, ""));
+    if (navigator.userAgentData) {
+        const brands = navigator.userAgentData.brands.map(
+            (b) => ({brand: b.brand.replace("HeadlessChrome", "Google Chrome"), version: b.version}));
+        define(navigator.userAgentData, "brands", brands);
+    }
+    if (!window.chrome) {
+        window.chrome = {runtime: {}, app: {isInstalled: false}, csi: () => ({}), loadTimes: () => ({})};
+    }
+    const query = window.navigator.permissions && window.navigator.permissions.query;
+    if (query) {
+        window.navigator.permissions.query = (params) => params && params.name === "notifications"
+            ? Promise.resolve({state: Notification.permission})
+            : query.call(window.navigator.permissions, params);
+    }
+})();
+"""
+
+
+@dataclass
+class StealthProfile:
+    """How a scraper browser presents itself."""
+
+    locale: str = "fr-FR"
+    languages: tuple = ("fr-FR", "fr", "en-US", "en")
+    timezone_id: str = "Europe/Zurich"
+    viewport: dict = field(default_factory=lambda: {"width": 1366, "height": 768})
+    user_agent: str = None  # None = UA Chrome asli tanpa "Headless" (butuh browser.version)
+    platform_ua: str = "Windows NT 10.0; Win64; x64"
+    args: tuple = STEALTH_ARGS
+
+    def user_agent_for(self, browser_version: str = None) -> str:
+        if self.user_agent or not browser_version:
+            return self.user_agent
+        major = re.match(r"\d+", browser_version).group(0)
+        return (f"Mozilla/5.0 ({self.platform_ua}) AppleWebKit/537.36 "
+                f"(KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36")
+
+    def launch_options(self, headless: bool = HEADLESS) -> dict:
+        """Keyword arguments for ``chromium.launch`` / ``launch_persistent_context``."""
+        return {"headless": headless, "args": list(self.args)}
+
+    def context_options(self, browser_version: str = None) -> dict:
+        """Keyword arguments for ``new_context`` / ``launch_persistent_context``."""
+        options = {
+            "locale": self.locale,
+            "timezone_id": self.timezone_id,
+            "viewport": self.viewport,
+            "extra_http_headers": {"Accept-Language": accept_language(self.languages)},
+        }
+        user_agent = self.user_agent_for(browser_version)
+        if user_agent:
+            options["user_agent"] = user_agent
+        return options
+
+    def init_script(self) -> str:
+        languages = "[" + ", ".join(f'"{lang}"' for lang in self.languages) + "]"
+        return STEALTH_INIT_JS % {"languages": languages}
+
+
+def accept_language(languages) -> str:
+    parts = []
+    for i, lang in enumerate(languages):
+        parts.append(lang if i == 0 else f"{lang};q={max(0.1, 1 - i / 10):.1f}")
+    return ",".join(parts)
+
+
+async def apply_stealth(context, profile: StealthProfile):
+    """Install the profile's init script on every page of ``context``."""
+    await context.add_init_script(profile.init_script())
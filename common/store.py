@@ -0,0 +1,198 @@
+"""Local SQLite store of the doctors of every scraper, one row per doctor and source.
+
+Rows follow ``common.schema`` and are keyed by ``(source, key)``, the key
+being the stable ``delta.record_key`` (normalized name + country + ZIP, or
+phone), so the same doctor listed by doctena and invisalign shares a key.
+ZIPs are stored as digits next to the country: ``--zip L-2449`` finds 2449
+in Luxembourg only, a bare ``--zip 2449`` any country. Each page is
+upserted in one transaction: a doctor seen again is updated in place and
+keeps its ``first_seen``. Indexes on name, ZIP + country, city and key make
+lookups and cross-source joins cheap::
+
+    python -m common.store doctors.db --zip L-2449
+    python -m common.store doctors.db --both-sources
+"""
+import argparse
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from .delta import record_key
+from .normalize import ZIP_PREFIXES
+from .schema import DOCTOR_FIELDS
+
+SCHEMA_VERSION = 1
+COLUMNS = tuple(name for name, _ in DOCTOR_FIELDS if name != "scraped_at")
+BUSY_TIMEOUT_MS = 30000  # doctena & invisalign boleh menulis ke file yang sama bersamaan
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS doctors (
+    key TEXT NOT NULL,
+    {", ".join(f"{name} TEXT NOT NULL DEFAULT ''" for name in COLUMNS)},
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (source, key)
+);
+CREATE INDEX IF NOT EXISTS doctors_name ON doctors (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS doctors_zip_country ON doctors (zip, country);
+CREATE INDEX IF NOT EXISTS doctors_city ON doctors (city COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS doctors_key ON doctors (key);
+"""
+
+UPSERT = f"""
+INSERT INTO doctors (key, {", ".join(COLUMNS)}, first_seen, last_seen)
+VALUES (?, {", ".join("?" for _ in COLUMNS)}, ?, ?)
+ON CONFLICT (source, key) DO UPDATE SET
+    {", ".join(f"{name} = excluded.{name}" for name in COLUMNS if name != "source")},
+    last_seen = excluded.last_seen
+"""
+
+
+def zip_digits(zip_code: str) -> str:
+    """``"L-2449"`` -> ``"2449"``, the form ZIPs are stored in."""
+    return re.sub(r"\D", "", zip_code or "")
+
+
+def zip_country(zip_code: str) -> str:
+    """Country a ZIP prefix stands for (``"L-2449"`` -> ``"Luxembourg"``), or ``""``."""
+    match = re.match(r"\s*([A-Za-z]{1,2})\s*-", zip_code or "")
+    return ZIP_PREFIXES.get(match.group(1).upper(), "") if match else ""
+
+
+class DoctorStore:
+    """Doctors of all sources in the SQLite file at ``path``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.upserted = 0
+        self._db = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"{path} memakai skema v{version}, versi ini hanya mengenal "
+                               f"v{SCHEMA_VERSION}")
+        with self._db:
+            self._db.executescript(SCHEMA)
+            self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        # Koneksi dipakai dari worker thread (write_rows), satu per satu
+        self._lock = threading.Lock()
+
+    def upsert(self, records: list) -> int:
+        """Insert or update ``records`` (``schema.doctor`` dicts) in one transaction."""
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        rows = []
+        for record in records:
+            seen = record.get("scraped_at") or now
+            if isinstance(seen, datetime):
+                seen = seen.isoformat(timespec="seconds")
+            values = [record.get(name) or "" for name in COLUMNS]
+            country = record.get("country") or zip_country(record.get("zip"))
+            values[COLUMNS.index("zip")] = zip_digits(record.get("zip"))
+            values[COLUMNS.index("country")] = country
+            key = record_key(record.get("name", ""), record.get("zip", ""), record.get("tel", ""),
+                             country)
+            rows.append((key, *values, seen, seen))
+        with self._lock, self._db:
+            self._db.executemany(UPSERT, rows)
+        self.upserted += len(rows)
+        return len(rows)
+
+    async def write_rows(self, records: list):
+        """Like ``upsert``, in a worker thread."""
+        if records:
+            await asyncio.to_thread(self.upsert, records)
+
+    def find(self, name: str = None, zip_code: str = None, city: str = None,
+             source: str = None, limit: int = None, country: str = None) -> list:
+        """Doctors matching every given filter; ``name`` matches a prefix, case-insensitively.
+
+        A ZIP with a country prefix (``"L-2449"``) also filters on that country.
+        """
+        clauses, params = [], []
+        if name:
+            clauses.append("name LIKE ? COLLATE NOCASE")
+            params.append(f"{name}%")
+        if zip_code:
+            clauses.append("zip = ?")
+            params.append(zip_digits(zip_code))
+            country = country or zip_country(zip_code) or None
+        if city:
+            clauses.append("city = ? COLLATE NOCASE")
+            params.append(city)
+        if country:
+            clauses.append("country = ?")
+            params.append(country)
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        query = "SELECT * FROM doctors"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY name"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [dict(row) for row in self._db.execute(query, params)]
+
+    def in_all_sources(self, sources=("doctena", "invisalign")) -> list:
+        """Doctors listed by every one of ``sources``: one row per key, sources joined by ","."""
+        placeholders = ", ".join("?" for _ in sources)
+        query = f"""
+            SELECT key, MIN(name) AS name, MIN(zip) AS zip, MIN(city) AS city,
+                   GROUP_CONCAT(source, ',') AS sources
+            FROM doctors WHERE source IN ({placeholders})
+            GROUP BY key HAVING COUNT(DISTINCT source) = ?
+            ORDER BY name
+        """
+        with self._lock:
+            return [dict(row) for row in self._db.execute(query, (*sources, len(set(sources))))]
+
+    def count(self, source: str = None) -> int:
+        query, params = "SELECT COUNT(*) FROM doctors", ()
+        if source:
+            query, params = query + " WHERE source = ?", (source,)
+        with self._lock:
+            return self._db.execute(query, params).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def summary(self) -> str:
+        return f"🗄️ {self.upserted} dokter di-upsert ke {self.path} ({self.count()} total)"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query the SQLite doctor store.")
+    parser.add_argument("db", help="SQLite file written by the scrapers")
+    parser.add_argument("--name", help="name prefix")
+    parser.add_argument("--zip", dest="zip_code", help="ZIP code, e.g. L-2449 or 1003")
+    parser.add_argument("--city")
+    parser.add_argument("--country", help="Luxembourg or Switzerland")
+    parser.add_argument("--source", help="doctena or invisalign")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--both-sources", action="store_true",
+                        help="doctors listed by both doctena and invisalign")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    store = DoctorStore(args.db)
+    started = time.perf_counter()
+    if args.both_sources:
+        rows = store.in_all_sources()[:args.limit]
+    else:
+        rows = store.find(args.name, args.zip_code, args.city, args.source, args.limit,
+                          args.country)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for row in rows:
+        sources = row.get("sources") or row["source"]
+        print(f"{row['name']} | {row['zip']} {row['city']} | {sources}")
+    print(f"🔎 {len(rows)} dokter ({elapsed_ms:.1f} ms)")
+    store.close()
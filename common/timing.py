@@ -0,0 +1,122 @@
+"""Per-stage timings of a crawl as structured JSON lines plus a run summary.
+
+Every timed span (browser launch, goto, readiness wait, dialog handling,
+extraction, parsing, writing) becomes one JSON object per line::
+
+    {"ts": 1760000000.1, "run": "20261018T101500", "stage": "goto", "ms": 812.4, "page": 3}
+
+At the end ``summary()`` gives count, p50, p95 and max per stage and the
+bytes the browser actually transferred, so a slow run can be pinned on the
+proxy, the site or our own code.
+"""
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (not necessarily sorted)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Timings:
+    """Collects stage durations; logs each to ``log_path`` (JSON lines) when given."""
+
+    def __init__(self, log_path: str = None, run_id: str = None):
+        self.run_id = run_id or time.strftime("%Y%m%dT%H%M%S")
+        self.samples = defaultdict(list)  # stage -> [ms]
+        self.errors = defaultdict(int)
+        self.bytes_transferred = 0
+        self.requests = 0
+        self.started = time.perf_counter()
+        self._log = open(log_path, "a", encoding="utf-8") if log_path else None
+        self._pending = set()
+
+    def emit(self, event: dict):
+        if self._log is not None:
+            self._log.write(json.dumps({"ts": round(time.time(), 3), "run": self.run_id, **event},
+                                       ensure_ascii=False) + "\n")
+            self._log.flush()
+
+    def record(self, stage: str, seconds: float, **fields):
+        ms = seconds * 1000
+        self.samples[stage].append(ms)
+        if "error" in fields:
+            self.errors[stage] += 1
+        self.emit({"stage": stage, "ms": round(ms, 1), **fields})
+
+    @contextmanager
+    def span(self, stage: str, **fields):
+        """Time the ``with`` body (``await`` inside is fine) as one ``stage`` sample."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            fields["error"] = e.__class__.__name__
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - started, **fields)
+
+    def track_bytes(self, context):
+        """Add the encoded size of every finished request of ``context`` to the run."""
+        def on_finished(request):
+            task = asyncio.ensure_future(self._add_sizes(request))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+        context.on("requestfinished", on_finished)
+
+    async def _add_sizes(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return  # context sudah ditutup
+        self.requests += 1
+        self.bytes_transferred += (sizes["requestHeadersSize"] + sizes["requestBodySize"]
+                                   + sizes["responseHeadersSize"] + sizes["responseBodySize"])
+
+    def summary(self) -> dict:
+        stages = {}
+        for stage, values in self.samples.items():
+            stages[stage] = {
+                "count": len(values),
+                "errors": self.errors.get(stage, 0),
+                "p50_ms": round(percentile(values, 50), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+                "max_ms": round(max(values), 1),
+                "total_ms": round(sum(values), 1),
+            }
+        return {
+            "run": self.run_id,
+            "elapsed_s": round(time.perf_counter() - self.started, 2),
+            "requests": self.requests,
+            "bytes_transferred": self.bytes_transferred,
+            "stages": stages,
+        }
+
+    def summary_text(self) -> str:
+        summary = self.summary()
+        lines = [f"⏱️ {summary['elapsed_s']} detik, {summary['requests']} request, "
+                 f"{summary['bytes_transferred'] / 1e6:.1f} MB ditransfer"]
+        for stage, s in sorted(summary["stages"].items()):
+            lines.append(f"   {stage:<10} n={s['count']:<4} p50={s['p50_ms']:.0f}ms "
+                         f"p95={s['p95_ms']:.0f}ms max={s['max_ms']:.0f}ms")
+        return "\n".join(lines)
+
+    def close(self, stream=sys.stdout):
+        """Log the summary event, print it and close the log."""
+        for task in self._pending:
+            task.cancel()
+        self.emit({"event": "summary", **self.summary()})
+        print(self.summary_text(), file=stream)
+        if self._log is not None:
+            self._log.close()
+            self._log = None
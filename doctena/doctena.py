@@ -1,151 +1,425 @@
+import argparse
 import asyncio
-from playwright.async_api import async_playwright
-import csv
+import itertools
+import pandas as pd
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import os
+import sys
+import time
+from contextlib import AsyncExitStack
+from dataclasses import replace
 
-# Proxy data
-proxy_host = ""
-proxy_port = ""
-proxy_user = ""
-proxy_pass = ""
+# common/ ada di root repo, dipakai bersama scraper invisalign
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
 
+from common.blocking import BlockingProfile, BlockStats, apply_blocking  # noqa: E402
+from common.cache import PageCache  # noqa: E402
+from common.checkpoint import open_state  # noqa: E402
+from common.cli import add_common_args, add_output_args  # noqa: E402
+from common.dataset import open_dataset  # noqa: E402
+from common.dedup import DedupIndex  # noqa: E402
+from common.normalize import normalize_frame  # noqa: E402
+from common.delta import DeltaIndex, DeltaWriter, record_key  # noqa: E402
+from common.har import HarArchive, har_archive  # noqa: E402
+from common.pagination import PageBound, total_from_text  # noqa: E402
+from common.proxies import ProxyBanned, ProxyPool, is_ban_status, is_proxy_error  # noqa: E402
+from common.readiness import Readiness, prepare_page, wait_until_ready  # noqa: E402
+from common.retry import HTTPStatusError, PageFailed, PageNotReady, RetryPolicy  # noqa: E402
+from common.schema import doctor  # noqa: E402
+from common.session import SessionStore  # noqa: E402
+from common.sink import RecordSink  # noqa: E402
+from common.stealth import HEADLESS, StealthProfile, apply_stealth  # noqa: E402
+from common.store import DoctorStore  # noqa: E402
+from common.timing import Timings  # noqa: E402
 
 country = "Luxembourg"
 base_url = "https://www.doctena.lu/fr/orthodontiste/luxembourg?sort_by=proximity&doctorLanguage=fr&page={}"
 
-# Output CSV
+# Output CSV (pakai ekstensi .jsonl untuk output JSON Lines)
 csv_filename = "doctena_dokter_new.csv"
+CSV_FIELDS = [
+    "Nama Lengkap", "First Name", "Last Name", "Address 2", "ZIP", "City", "Country",
+    "Alamat Lengkap", "Speciality"
+]
 
-async def main():
-    async with async_playwright() as p:
-        user_data_dir = os.path.abspath("user_data")
-
-        browser = await p.chromium.launch_persistent_context(
-            user_data_dir=user_data_dir,
-            headless=False,
-            proxy={
-                "server": f"http://{proxy_host}:{proxy_port}",
-                "username": proxy_user,
-                "password": proxy_pass
-            },
-            args=["--disable-blink-features=AutomationControlled"]
+# Dataset Parquet bertipe (zstd), dipartisi per source/country/canton/run_date;
+# CSV di atas tetap ditulis sebagai ekspor untuk Excel
+DATASET_DIR = "dataset"
+
+# Database SQLite bersama semua scraper (upsert per halaman), lihat common/store.py
+DB_FILE = "doctors.db"
+
+# Progres crawl disimpan di sini supaya run berikutnya bisa melanjutkan
+STATE_FILE = "doctena_state.json"
+
+# Durasi tiap tahap per halaman (JSON lines), ringkasan p50/p95/max di akhir run
+TIMINGS_FILE = "doctena_timings.jsonl"
+
+# Hanya dokter baru/berubah/hilang dibanding run lengkap sebelumnya (JSON lines per run);
+# hash record run sebelumnya disimpan di DELTA_INDEX_FILE (SQLite)
+DELTA_FILE = "doctena_delta.jsonl"
+DELTA_INDEX_FILE = "doctena_index.sqlite"
+CRAWL_KEY = base_url
+
+# Hasil mentah per halaman, dipakai ulang selama masih segar (lihat --cache-only)
+CACHE_DIR = os.path.join(".cache", "doctena")
+
+# Proxy dibaca dari SCRAPER_PROXIES / SCRAPER_PROXY_FILE (lihat common/proxies.py);
+# browser tetap di satu proxy selama proxy itu sehat
+PROXY_SESSION = "doctena"
+
+# Cookie & localStorage doctena.lu saja (bukan profil Chromium lengkap), dipakai ulang antar run
+SESSION = SessionStore("doctena_session.json", domains=("doctena.lu",))
+
+# Halaman yang gagal dicoba ulang dengan backoff; yang tetap gagal dicatat
+# di STATE_FILE (dead letter) dan bisa diambil ulang dengan --replay-dead
+RETRY = RetryPolicy(attempts=4, base_delay=2.0, max_delay=30.0)
+MAX_DEAD_STREAK = 3  # halaman gagal berturut-turut sebelum crawl dihentikan
+
+# Headless dengan sidik jari browser biasa (webdriver, bahasa, zona waktu, window.chrome)
+STEALTH = StealthProfile(timezone_id="Europe/Luxembourg")
+
+# Gambar, font, media dan tracker tidak lewat proxy (None = download semua)
+BLOCKING = BlockingProfile()
+
+# Halaman siap begitu jumlah blok dokter berhenti berubah
+READINESS = Readiness(
+    results_selector=".Search__result-infos",
+    timeout_ms=15000,
+)
+
+# Elemen yang menampilkan jumlah hasil ("42 résultats"); teks halaman lain tidak dipakai
+TOTAL_SELECTOR = "h1"
+
+# Dijalankan sekali di browser untuk semua blok .Search__result-infos
+EXTRACT_JS = """
+(blocks) => blocks.map((block) => {
+    const nama = block.querySelector("h5 a");
+    const alamat = block.querySelector("p.dsg-no-mg-bottom");
+    const speciality = block.querySelector("p.Search__result-speciality");
+    return {
+        nama: nama ? nama.innerText : null,
+        alamat: alamat ? alamat.innerText : null,
+        speciality: speciality ? Array.from(speciality.querySelectorAll("a"), (a) => a.innerText) : [],
+    };
+})
+"""
+
+
+def build_records(blocks: list) -> list:
+    """Turn the blocks EXTRACT_JS took from one page into ``schema.doctor`` records,
+    normalized as a batch."""
+    frame = pd.DataFrame({
+        "name": [block["nama"] for block in blocks],
+        "address": [block["alamat"] for block in blocks],
+        "speciality": [", ".join(block["speciality"]) for block in blocks],
+    })
+    complete = frame["name"].notna() & frame["address"].notna()
+    if not complete.all():
+        print(f"⚠️ {int((~complete).sum())} dokter dilewati: nama (h5 a) atau alamat "
+              f"(p.dsg-no-mg-bottom) tidak ditemukan")
+        frame = frame[complete]
+
+    doctors = normalize_frame(frame, default_country=country)
+    doctors["speciality"] = frame["speciality"]
+    return [doctor("doctena", **fields) for fields in doctors.to_dict("records")]
+
+
+def to_csv_row(record: dict) -> dict:
+    return {
+        "Nama Lengkap": record["name"],
+        "First Name": record["first_name"],
+        "Last Name": record["last_name"],
+        "Address 2": record["street"],
+        "ZIP": record["zip"],
+        "City": record["city"],
+        "Country": record["country"],
+        "Alamat Lengkap": record["full_address"],
+        "Speciality": record["speciality"],
+    }
+
+
+def doctor_key(record: dict) -> str:
+    return record_key(record["name"], record["zip"], country=record["country"])
+
+
+async def launch_browser(p, timings: Timings, headless: bool = HEADLESS,
+                         per_context_proxy: bool = False):
+    launch = {}
+    if per_context_proxy:
+        # Chromium butuh proxy global supaya proxy per-context berlaku
+        launch["proxy"] = {"server": "http://per-context"}
+    with timings.span("launch"):
+        return await p.chromium.launch(**STEALTH.launch_options(headless), **launch)
+
+
+async def open_context(browser, proxy, block_stats: BlockStats, timings: Timings,
+                       har: HarArchive = None, blocking: BlockingProfile = BLOCKING):
+    """New context through ``proxy``, warmed with the saved session; returns ``(context, page, tracker)``.
+
+    With ``har`` the context is recorded to, or replayed from, that archive.
+    ``blocking`` None (--no-block) lets every request through.
+    """
+    with timings.span("context", proxy=str(proxy) if proxy else None):
+        context = await browser.new_context(
+            storage_state=SESSION.load(),
+            proxy=proxy.as_playwright() if proxy else None,
+            **STEALTH.context_options(browser.version),
         )
+        await apply_stealth(context, STEALTH)
+    timings.track_bytes(context)
+
+    if blocking is not None:
+        await apply_blocking(context, blocking, block_stats)
+    if har is not None:
+        await har.attach(context)
+
+    page = await context.new_page()
+    tracker = await prepare_page(page, READINESS)
+    return context, page, tracker
+
+
+async def close_context(context, save_session: bool = True):
+    """Save the session (consent cookies, tokens) and close ``context``."""
+    try:
+        if save_session:
+            await SESSION.save(context)
+    finally:
+        await context.close()
+
+
+async def fetch_blocks(page, tracker, url: str, timings: Timings) -> list:
+    """Open one listing page and extract all result blocks with EXTRACT_JS.
+
+    Raises ``ProxyBanned``, ``HTTPStatusError`` or ``PageNotReady`` so the
+    retry policy can tell a flaky page from the end of the listing.
+    """
+    with timings.span("goto", url=url):
+        response = await page.goto(url, timeout=60000, wait_until="domcontentloaded")
+    if response is not None:
+        if is_ban_status(response.status):
+            raise ProxyBanned(response.status, url)
+        if response.status in (404, 410):
+            return []  # lewat halaman terakhir
+        if response.status >= 400:
+            raise HTTPStatusError(response.status, url)
+
+    try:
+        with timings.span("readiness", url=url):
+            await wait_until_ready(page, READINESS, tracker, timings)
+    except (PlaywrightTimeoutError, asyncio.TimeoutError) as e:
+        raise PageNotReady("hasil .Search__result-infos tidak stabil dalam batas waktu") from e
+
+    # Semua field semua dokter di halaman ini diambil dalam satu panggilan
+    with timings.span("extract", url=url):
+        return await page.eval_on_selector_all(".Search__result-infos", EXTRACT_JS)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape the doctena.lu orthodontist listing.")
+    add_common_args(parser, RETRY)
+    parser.add_argument("--timings", default=TIMINGS_FILE, metavar="FILE",
+                        help="JSON-lines file for per-stage timings")
+    add_output_args(parser, DATASET_DIR, DB_FILE)
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    har = har_archive(args, "doctena")
+    replaying = har is not None and har.replaying
+    if har is not None:
+        # Rekaman/replay harus melewati seluruh crawl, bukan cache atau progres lama
+        args.fresh = args.no_cache = True
+
+    try:
+        state = open_state(STATE_FILE, [CRAWL_KEY], cache_only=args.cache_only and not args.no_cache)
+    except RuntimeError as e:
+        print(f"🛑 {e}")
+        return
+    resuming = args.replay_dead or (not args.fresh and state.has_unfinished([CRAWL_KEY])
+                                    and os.path.exists(csv_filename))
+    if not resuming:
+        state.reset([CRAWL_KEY])
+    retry = replace(RETRY, attempts=max(1, args.retries))
+
+    cache = None
+    if not args.no_cache:
+        cache = PageCache(CACHE_DIR, ttl=args.cache_ttl, cache_only=args.cache_only)
+
+    proxies = ProxyPool([]) if replaying else ProxyPool.load(args.proxies)
+    proxy = proxies.pick(PROXY_SESSION)
+    blocking = None if args.no_block else BLOCKING
+    block_stats = BlockStats() if blocking is not None else None
+    timings = Timings(args.timings)
+    async with AsyncExitStack() as stack:
+        # Progres ditulis di thread; pastikan perubahan terakhir sudah di disk
+        stack.push_async_callback(state.flush)
+        browser = context = page = tracker = None
+        # Mode cache-only tidak butuh browser sama sekali
+        if cache is None or not cache.cache_only:
+            p = await stack.enter_async_context(async_playwright())
+            browser = await launch_browser(p, timings, args.headless,
+                                           per_context_proxy=len(proxies) > 0)
+            stack.push_async_callback(browser.close)
+            context, page, tracker = await open_context(browser, proxy, block_stats, timings,
+                                                        har, blocking)
+            # Menyimpan session & menutup context yang aktif saat keluar, juga setelah ganti proxy
+            stack.push_async_callback(lambda: close_context(context, save_session=not replaying))
+
+        # Jumlah hasil yang ditampilkan situs menentukan halaman terakhir
+        bound = PageBound(first_page=1)
+        reported = {}  # url -> jumlah hasil di elemen TOTAL_SELECTOR halaman itu
+
+        async def fetch_live(url):
+            started = time.monotonic()
+            blocks = await fetch_blocks(page, tracker, url, timings)
+            proxies.report(proxy, ok=True, latency=time.monotonic() - started)
+            if bound.total is None and blocks:
+                counter = page.locator(TOTAL_SELECTOR).first
+                if await counter.count():
+                    reported[url] = total_from_text(await counter.inner_text())
+            return blocks
+
+        async def on_error(error):
+            nonlocal context, page, tracker, proxy
+            banned = isinstance(error, ProxyBanned) or is_proxy_error(error)
+            proxies.report(proxy, ok=False, banned=banned)
+            # Ban / timeout: percobaan berikutnya lewat proxy lain
+            timed_out = isinstance(error, (PlaywrightTimeoutError, PageNotReady))
+            if len(proxies) > 1 and (banned or timed_out):
+                proxy = proxies.rotate(PROXY_SESSION)
+                print(f"🔀 Ganti proxy ke {proxy}")
+                await close_context(context)
+                context, page, tracker = await open_context(browser, proxy, block_stats, timings,
+                                                            har, blocking)
+
+        if args.replay_dead:
+            page_numbers = sorted(state.dead_letters(CRAWL_KEY))
+            print(f"♻️ Mengambil ulang {len(page_numbers)} halaman yang gagal")
+        else:
+            page_numbers = itertools.count(state.next_page(CRAWL_KEY, 1))
+            if resuming:
+                print(f"⏩ Melanjutkan dari halaman {state.next_page(CRAWL_KEY, 1)} "
+                      f"({state.rows(CRAWL_KEY)} baris sudah tersimpan)")
+
+        # Baris ditulis & di-flush per halaman, jadi crash tidak menghapus hasil sebelumnya
+        # Cache-only / replay HAR bukan listing terkini: indeks delta & store tidak diubah
+        live = not replaying and (cache is None or not cache.cache_only)
+        delta = DeltaIndex(DELTA_INDEX_FILE)
+        stack.callback(delta.close)
+        delta_writer = DeltaWriter(delta)
+        if live:
+            await asyncio.to_thread(delta.begin, CRAWL_KEY, resuming)
+            delta_writer.sink = await stack.enter_async_context(
+                RecordSink(DELTA_FILE, append=resuming))
+        # Urutan "proximity" bisa menampilkan dokter yang sama di beberapa halaman
+        dedup = DedupIndex()
+        stack.callback(dedup.close)
+        if resuming:
+            dedup.update(await asyncio.to_thread(delta.keys, CRAWL_KEY))
+        dataset = open_dataset(args.dataset, "doctena") if args.dataset else None
+        if dataset is not None:
+            # Potongan per halaman dari run ini digabung jadi satu file per partisi
+            stack.push_async_callback(asyncio.to_thread, dataset.compact)
+        store = DoctorStore(args.db) if args.db and live else None
+        if store is not None:
+            stack.callback(store.close)
+
+        async def finish_crawl():
+            state.finish(CRAWL_KEY)
+            # Dokter "hilang" hanya bisa dipastikan kalau tidak ada halaman yang gagal
+            if not state.dead_letters(CRAWL_KEY):
+                await delta_writer.finish(CRAWL_KEY)
+
+        async with RecordSink(csv_filename, CSV_FIELDS, append=resuming) as sink:
+            dead_streak = 0
+            for page_number in page_numbers:
+                if not args.replay_dead and bound.end is not None and page_number >= bound.end:
+                    print(f"📭 Semua {bound.end - 1} halaman sudah diambil, selesai.")
+                    await finish_crawl()
+                    break
+
+                url = base_url.format(page_number)
+                print(f"🔄 Membuka halaman {page_number}: {url}")
+
+                dokter_blocks = None
+                if cache is not None:
+                    # Baca/tulis cache ke disk di thread, bukan di event loop
+                    dokter_blocks = await asyncio.to_thread(cache.get, url)
+                if dokter_blocks is None and page is not None:
+                    try:
+                        dokter_blocks = await retry.call(fetch_live, url, label=f"Halaman {page_number}",
+                                                         on_error=on_error)
+                    except PageFailed as e:
+                        # Halaman ini dilewati, bukan akhir crawl
+                        print("❌ Gagal membuka halaman:", e)
+                        state.dead_letter(CRAWL_KEY, page_number, url, e.error, e.attempts)
+                        state.commit(CRAWL_KEY, page_number, [])
+                        dead_streak += 1
+                        if dead_streak >= MAX_DEAD_STREAK:
+                            print(f"🛑 {dead_streak} halaman berturut-turut gagal, berhenti. "
+                                  f"Jalankan lagi untuk melanjutkan.")
+                            break
+                        continue
+                    dead_streak = 0
+                    # Simpan hasil mentah EXTRACT_JS supaya build_records bisa diulang offline
+                    if cache is not None and dokter_blocks:
+                        await asyncio.to_thread(cache.put, url, dokter_blocks)
+
+                if not dokter_blocks:
+                    if args.replay_dead:
+                        if dokter_blocks is not None:
+                            state.resolve(CRAWL_KEY, page_number)
+                        continue
+                    print("📭 Tidak ada data lagi, selesai.")
+                    await finish_crawl()
+                    break
+
+                total = reported.pop(url, None)
+                if bound.observe(dokter_blocks, total) is not None and total is not None:
+                    print(f"📊 Situs menampilkan {total} hasil")
+                with timings.span("parse", page=page_number):
+                    # Normalisasi pandas di thread: event loop tetap melayani browser
+                    records = await asyncio.to_thread(build_records, dokter_blocks)
+                    doctors = dedup.unique(records, doctor_key)
+                    rows = [to_csv_row(record) for record in doctors]
+
+                with timings.span("write", page=page_number, rows=len(rows)):
+                    if dataset is not None:
+                        await dataset.write_rows(doctors)
+                    if store is not None:
+                        await store.write_rows(doctors)
+                    await sink.write_rows(rows)
+                    keyed = [(doctor_key(record), row) for record, row in zip(doctors, rows)]
+                    await delta_writer.changes(CRAWL_KEY, keyed)
+                    state.commit(CRAWL_KEY, page_number, rows)
+                    state.resolve(CRAWL_KEY, page_number)
+                print(f"✅ Halaman {page_number} selesai. Total data sejauh ini: {state.rows(CRAWL_KEY)}\n")
+
+    if block_stats is not None:
+        print(block_stats.summary())
+    print(proxies.summary())
+    if har is not None:
+        print(har.summary())
+    timings.close()
+    if cache is not None:
+        print(cache.summary())
+
+    print(f"✅ Data disimpan ke {csv_filename} ({state.rows(CRAWL_KEY)} baris)")
+    if dataset is not None:
+        print(dataset.summary())
+    if store is not None:
+        print(store.summary())
+    print(dedup.summary())
+    if live:
+        print(delta_writer.summary())
+    else:
+        print("🔁 Delta & database dilewati: data dari cache/HAR, bukan listing terkini")
+    dead = len(state.dead_letters(CRAWL_KEY))
+    if dead:
+        print(f"☠️ {dead} halaman gagal, ambil ulang dengan --replay-dead")
+
 
-        page = await browser.new_page()
-
-        results = []
-        page_number = 1
-
-        while True:
-            url = base_url.format(page_number)
-            print(f"🔄 Membuka halaman {page_number}: {url}")
-
-            try:
-                await page.goto(url, timeout=60000)
-                await page.wait_for_timeout(5000)
-            except Exception as e:
-                print("❌ Gagal membuka halaman:", e)
-                break
-
-            dokter_blocks = await page.query_selector_all(".Search__result-infos")
-
-            if not dokter_blocks:
-                print("📭 Tidak ada data lagi, selesai.")
-                break
-
-            for block in dokter_blocks:
-                try:
-                    # Nama lengkap
-                    nama_elem = await block.query_selector("h5 a")
-                    nama_lengkap = await nama_elem.inner_text()
-
-                    # Pecah nama
-                    nama_parts = nama_lengkap.replace("Dr. ", "").strip().split()
-                    first_name = nama_parts[0] if len(nama_parts) > 0 else ""
-                    last_name = nama_parts[1] if len(nama_parts) > 1 else ""
-
-                    # Alamat
-                    alamat_elem = await block.query_selector("p.dsg-no-mg-bottom")
-                    alamat_text = await alamat_elem.inner_text()
-                    lines = alamat_text.strip().split("\n")
-                    address2 = lines[0].strip() if len(lines) > 0 else ""
-                    zipcode = ""
-                    city = ""
-                    if len(lines) > 1:
-                        zipcode_city = lines[1].strip().split(" ", 1)
-                        zipcode = zipcode_city[0]
-                        city = zipcode_city[1] if len(zipcode_city) > 1 else ""
-
-                    # === Full address (alamat lengkap)
-                    alamat_full_elem = await block.query_selector("p.dsg-no-mg-bottom")
-                    alamat_lengkap = await alamat_full_elem.inner_text() if alamat_full_elem else ""
-
-                    # === Speciality
-                    speciality_elem = await block.query_selector("p.Search__result-speciality")
-                    speciality_links = await speciality_elem.query_selector_all("a") if speciality_elem else []
-                    speciality_list = [await a.inner_text() for a in speciality_links]
-                    speciality = ", ".join(speciality_list)
-
-                    # results.append({
-                    #     "Nama Lengkap": nama_lengkap,
-                    #     "First Name": first_name,
-                    #     "Last Name": last_name,
-                    #     "Address 2": address2,
-                    #     "ZIP": zipcode,
-                    #     "City": city,
-                    #     "Country": country
-                    # })
-                    results.append({
-                        "Nama Lengkap": nama_lengkap,
-                        "First Name": first_name,
-                        "Last Name": last_name,
-                        "Address 2": address2,
-                        "ZIP": zipcode,
-                        "City": city,
-                        "Country": country,
-                        "Alamat Lengkap": alamat_lengkap,
-                        "Speciality": speciality
-                    })
-
-                except Exception as e:
-                    print("⚠️ Gagal parsing 1 dokter:", e)
-                    continue
-
-            print(f"✅ Halaman {page_number} selesai. Total data sejauh ini: {len(results)}\n")
-            page_number += 1
-
-            # Simpan ke CSV
-            # with open(csv_filename, mode="w", newline="", encoding="utf-8") as file:
-            #     writer = csv.DictWriter(file, fieldnames=[
-            #         "Nama Lengkap", "First Name", "Last Name", "Address 2", "ZIP", "City", "Country"
-            #     ])
-            #     writer.writeheader()
-            #     writer.writerows(results)
-
-            # print(f"✅ Data disimpan ke {csv_filename} ({len(results)} baris)")
-        await browser.close()
-
-        # # Simpan ke CSV
-        # with open(csv_filename, mode="w", newline="", encoding="utf-8") as file:
-        #     writer = csv.DictWriter(file, fieldnames=[
-        #         "Nama Lengkap", "First Name", "Last Name", "Address 2", "ZIP", "City", "Country"
-        #     ])
-        #     writer.writeheader()
-        #     writer.writerows(results)
-
-        with open(csv_filename, mode="w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=[
-                "Nama Lengkap", "First Name", "Last Name", "Address 2", "ZIP", "City", "Country",
-                "Alamat Lengkap", "Speciality"
-            ])
-            writer.writeheader()
-            writer.writerows(results)
-
-        print(f"✅ Data disimpan ke {csv_filename} ({len(results)} baris)")
-
-
-
-
-
-
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
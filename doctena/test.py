@@ -2,12 +2,15 @@ import asyncio
 from playwright.async_api import async_playwright
 import csv
 import os
+import sys
 import time
-# Proxy data
-proxy_host = "lu.decodo.com"
-proxy_port = "25001"
-proxy_user = "user-splpl0mha6-sessionduration-60"
-proxy_pass = "yr+Qk6Rw6iCqq5w8Lc"
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.proxies import ProxyPool  # noqa: E402
+
+# Proxy diambil dari SCRAPER_PROXIES / SCRAPER_PROXY_FILE, bukan ditulis di sini
+proxy = ProxyPool.load().pick()
 
 
 country = "Luxembourg"
@@ -23,11 +26,7 @@ async def main():
         browser = await p.chromium.launch_persistent_context(
             user_data_dir=user_data_dir,
             headless=False,
-            proxy={
-                "server": f"http://{proxy_host}:{proxy_port}",
-                "username": proxy_user,
-                "password": proxy_pass
-            },
+            proxy=proxy.as_playwright() if proxy else None,
             args=["--disable-blink-features=AutomationControlled"]
         )
         
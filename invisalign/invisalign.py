@@ -0,0 +1,1100 @@
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import AsyncExitStack
+from dataclasses import replace
+from urllib.parse import urlsplit
+
+import pandas as pd
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+# common/ ada di root repo, dipakai bersama scraper doctena
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common.blocking import ANALYTICS_DOMAINS, BlockingProfile, BlockStats, apply_blocking  # noqa: E402
+from common.cache import PageCache  # noqa: E402
+from common.checkpoint import CrawlState, open_state  # noqa: E402
+from common.cli import add_common_args, add_output_args  # noqa: E402
+from common.dataset import open_dataset  # noqa: E402
+from common.dedup import DedupIndex  # noqa: E402
+from common.delta import DeltaIndex, DeltaWriter, record_key  # noqa: E402
+from common.har import HarArchive, har_archive  # noqa: E402
+from common.normalize import normalize_frame, split_names  # noqa: E402
+from common.pagination import PageBound, total_from_payload  # noqa: E402
+from common.proxies import ProxyBanned, ProxyPool, is_ban_status, is_proxy_error  # noqa: E402
+from common.readiness import (  # noqa: E402
+    EndpointTracker, Readiness, prepare_page, wait_until_ready,
+)
+from common.retry import HTTPStatusError, PageFailed, PageNotReady, RetryPolicy  # noqa: E402
+from common.schema import doctor  # noqa: E402
+from common.session import SessionStore  # noqa: E402
+from common.sink import RecordSink  # noqa: E402
+from common.stealth import HEADLESS, StealthProfile, apply_stealth  # noqa: E402
+from common.store import DoctorStore  # noqa: E402
+from common.timing import Timings  # noqa: E402
+from parsers import BACKENDS, make_record, parse_doctor_items  # noqa: E402
+
+BASE_URL = "https://www.invisalign.ch/fr/find-a-doctor"
+QUERY_SUFFIX = "&s=e"
+COUNTRY_CODE = "ch"
+COUNTRY = "Switzerland"  # kalau alamat tidak menyebut negara
+
+# Nama canton seperti yang dipakai di parameter c= invisalign.ch/fr
+CANTONS = [
+    "Argovie", "Appenzell Rhodes-Extérieures", "Appenzell Rhodes-Intérieures",
+    "Bâle-Campagne", "Bâle-Ville", "Berne", "Fribourg", "Genève", "Glaris",
+    "Grisons", "Jura", "Lucerne", "Neuchatel", "Nidwald", "Obwald", "Saint-Gall",
+    "Schaffhouse", "Schwytz", "Soleure", "Tessin", "Thurgovie", "Uri", "Valais",
+    "Vaud", "Zoug", "Zurich",
+]
+
+PAGES_PER_CONTEXT = 20  # context di-recycle setelah sekian halaman
+CONCURRENCY = 4  # jumlah halaman pr= yang di-fetch bersamaan per canton
+MAX_OPEN_PAGES = 8  # batas halaman terbuka di seluruh pool (semua canton)
+MIN_REQUEST_INTERVAL = 0.5  # detik minimal antar navigasi ke domain yang sama
+CAPTURE_API = True  # ambil data dari respons JSON XHR/fetch, bukan dari DOM
+API_TIMEOUT = 15  # detik menunggu respons API sebelum fallback ke DOM
+PARSER_BACKEND = "auto"  # selectolax > lxml > bs4, mana yang terpasang
+PARSE_WORKERS = min(4, os.cpu_count() or 1)  # proses parser HTML (0 = parse di event loop)
+PARSE_QUEUE_SIZE = 8  # HTML yang boleh antre menunggu parser sebelum fetcher ditahan
+# fork dari proses yang sudah menjalankan Playwright & event loop bisa deadlock. Proses
+# spawn mengimpor ulang __main__ (invisalign.py / index.py canton, jadi juga pandas,
+# playwright & common/) sekali per worker; main() sendiri tidak jalan karena dijaga __main__
+PARSE_START_METHOD = "spawn"
+RETRY = RetryPolicy(attempts=4, base_delay=2.0, max_delay=30.0)  # per halaman pr=
+MAX_DEAD_STREAK = 3  # halaman gagal berturut-turut sebelum crawl canton dihentikan
+
+READINESS = Readiness(
+    results_selector=".dl-results-item-container",
+    timeout_ms=10000,
+    endpoints=("doctor", "locator"),
+    dialogs={
+        ".modal-header .btn-close": ".modal-header .btn-close",
+        "#truste-consent-button": "#truste-consent-button",
+    },
+)
+
+# Kandidat nama field di JSON API doctor-locator (dicocokkan tanpa huruf besar/kecil)
+API_FIELDS = {
+    "name": ("fullname", "displayname", "doctorname"),
+    "first_name": ("firstname", "givenname"),
+    "last_name": ("lastname", "familyname", "surname"),
+    "address1": ("address1", "addressline1", "street", "streetaddress", "address"),
+    "address2": ("address2", "addressline2"),
+    "zip": ("postalcode", "zipcode", "zip", "postcode"),
+    "city": ("city", "locality", "town"),
+    "country": ("country", "countryname"),
+    "tel": ("phone", "phonenumber", "telephone", "tel"),
+    "site": ("website", "websiteurl", "url", "web"),
+}
+
+# Headless dengan sidik jari browser biasa (UA tanpa "Headless", webdriver, bahasa, zona waktu)
+STEALTH = StealthProfile(timezone_id="Europe/Zurich")
+
+# Gambar, font, media, tracker dan aset consent TrustArc tidak perlu di-download
+BLOCKING = BlockingProfile(deny_domains=ANALYTICS_DOMAINS + ("trustarc.com", "truste.com"))
+
+STATE_FILENAME = "invisalign_state.json"  # progres crawl untuk resume
+SESSION_FILENAME = "invisalign_session.json"  # cookie consent & localStorage antar run
+SESSION_DOMAINS = ("invisalign.ch",)
+TIMINGS_FILENAME = "invisalign_timings.jsonl"  # durasi tiap tahap per halaman (JSON lines)
+DELTA_FILENAME = "invisalign_delta.jsonl"  # dokter baru/berubah/hilang dibanding run sebelumnya
+DELTA_INDEX_FILENAME = "invisalign_index.sqlite"  # hash record run lengkap terakhir per canton
+DATASET_DIRNAME = "dataset"  # dataset Parquet dipartisi per source/country/canton/run_date
+DB_FILENAME = "doctors.db"  # database SQLite bersama semua scraper (upsert per halaman)
+CACHE_DIR = os.path.join(".cache", "invisalign")  # halaman hasil render per URL
+
+CSV_HEADERS = [
+    "Name", "Address", "City", "Zip Code", "Country", "Tel", "Site", "Alamat Lengkap"
+]
+
+
+class DomainRateLimiter:
+    """Spaces out navigations to the same host by at least ``min_interval`` seconds."""
+
+    def __init__(self, min_interval: float = MIN_REQUEST_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot = {}  # domain -> waktu monotonic slot berikutnya
+
+    async def wait(self, url: str):
+        domain = urlsplit(url).hostname or ""
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(domain, 0.0))
+        self._next_slot[domain] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class BrowserPool:
+    """One long-lived Chromium shared by every results page.
+
+    Pages come from warm contexts, one per proxy when there are ``proxies``,
+    recycled after ``pages_per_context`` pages with their cookies carried
+    over; at most ``max_pages`` are open at once. Every context gets the
+    ``blocking``, ``stealth``, ``session`` and ``har`` setup it is given.
+    """
+
+    def __init__(self, playwright, pages_per_context: int = PAGES_PER_CONTEXT,
+                 max_pages: int = MAX_OPEN_PAGES,
+                 rate_limiter: DomainRateLimiter = None,
+                 blocking: BlockingProfile = BLOCKING,
+                 proxies: ProxyPool = None,
+                 headless: bool = HEADLESS,
+                 stealth: StealthProfile = STEALTH,
+                 session: SessionStore = None,
+                 timings: Timings = None,
+                 har: HarArchive = None):
+        self.playwright = playwright
+        self.session = session
+        self.har = har
+        self.timings = timings or Timings()
+        self.headless = headless
+        self.stealth = stealth
+        self.pages_per_context = pages_per_context
+        self.rate_limiter = rate_limiter or DomainRateLimiter()
+        self.blocking = blocking
+        self.block_stats = BlockStats()
+        self.proxies = proxies if proxies is not None else ProxyPool([])
+        # Satu context (sticky session) per proxy: halaman paralel tersebar ke beberapa IP
+        self.lanes = max(1, min(len(self.proxies), max_pages))
+        self._contexts = [None] * self.lanes  # lane -> context yang sedang dipakai
+        self._served = [0] * self.lanes
+        self._lane_of = {}  # context -> lane
+        self._proxy_of = {}  # context -> Proxy
+        self._rotate = set()  # lane yang pindah proxy saat recycle berikutnya
+        self.browser = None
+        self.storage_state = None
+        self._active = {}  # context -> jumlah page yang masih dipakai
+        self._retired = set()
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_pages)
+
+    async def start(self):
+        launch = {}
+        if len(self.proxies):
+            # Chromium butuh proxy global supaya proxy per-context berlaku
+            launch["proxy"] = {"server": "http://per-context"}
+        with self.timings.span("launch"):
+            self.browser = await self.playwright.chromium.launch(
+                **self.stealth.launch_options(self.headless), **launch)
+        if self.session is not None:
+            self.storage_state = self.session.load()
+        for lane in range(self.lanes):
+            await self._new_context(lane)
+
+    async def _new_context(self, lane: int):
+        proxy = self.proxies.pick(session=lane)
+        with self.timings.span("context", lane=lane):
+            context = await self.browser.new_context(
+                storage_state=self.storage_state,
+                proxy=proxy.as_playwright() if proxy else None,
+                **self.stealth.context_options(self.browser.version),
+            )
+            await apply_stealth(context, self.stealth)
+        self.timings.track_bytes(context)
+        self._proxy_of[context] = proxy
+        self._lane_of[context] = lane
+        if self.blocking is not None:
+            await apply_blocking(context, self.blocking, self.block_stats)
+        if self.har is not None:
+            await self.har.attach(context)
+        self._active[context] = 0
+        self._contexts[lane] = context
+        self._served[lane] = 0
+
+    async def acquire(self):
+        """Return a new page from the least busy warm context."""
+        await self._slots.acquire()
+        try:
+            async with self._lock:
+                lane = min(range(self.lanes), key=lambda n: self._active[self._contexts[n]])
+                if self._served[lane] >= self.pages_per_context or lane in self._rotate:
+                    await self._recycle(lane)
+                context = self._contexts[lane]
+                self._served[lane] += 1
+                self._active[context] += 1
+            return await context.new_page()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, page):
+        context = page.context
+        try:
+            await page.close()
+        finally:
+            self._active[context] -= 1
+            self._slots.release()
+            if context in self._retired and self._active[context] == 0:
+                await self._close_context(context)
+
+    async def navigate(self, page, url: str, **kwargs):
+        """``page.goto`` behind the rate limiter, reported to the proxy pool."""
+        proxy = self._proxy_of.get(page.context)
+        await self.rate_limiter.wait(url)
+        started = time.monotonic()
+        try:
+            with self.timings.span("goto", url=url, proxy=str(proxy) if proxy else None):
+                response = await page.goto(url, **kwargs)
+            if response is not None and is_ban_status(response.status):
+                raise ProxyBanned(response.status, url)
+            if response is not None and response.status >= 400:
+                raise HTTPStatusError(response.status, url)
+        except Exception as e:
+            banned = isinstance(e, ProxyBanned) or is_proxy_error(e)
+            self.proxies.report(proxy, ok=False, banned=banned)
+            lane = self._lane_of.get(page.context)
+            if proxy is not None and lane is not None and (
+                    banned or isinstance(e, PlaywrightTimeoutError)):
+                self._rotate.add(lane)
+            raise
+        self.proxies.report(proxy, ok=True, latency=time.monotonic() - started)
+        return response
+
+    async def _recycle(self, lane: int):
+        # Simpan cookie (consent) supaya context baru tetap "hangat"
+        old = self._contexts[lane]
+        self.storage_state = await self._snapshot(old)
+        self._retired.add(old)
+        if lane in self._rotate:
+            self.proxies.rotate(session=lane)
+            self._rotate.discard(lane)
+        await self._new_context(lane)
+        if self._active[old] == 0:
+            await self._close_context(old)
+
+    async def _snapshot(self, context) -> dict:
+        if self.session is not None:
+            return await self.session.save(context)
+        return await context.storage_state()
+
+    async def _close_context(self, context):
+        self._retired.discard(context)
+        self._active.pop(context, None)
+        self._lane_of.pop(context, None)
+        self._proxy_of.pop(context, None)
+        await context.close()
+
+    async def close(self):
+        if self._contexts[0] is not None and self.session is not None:
+            try:
+                await self.session.save(self._contexts[0])
+            except Exception as e:
+                print(f"⚠️ Gagal menyimpan session: {e}")
+        for context in list(self._active):
+            await context.close()
+        self._active.clear()
+        self._retired.clear()
+        self._lane_of.clear()
+        self._proxy_of.clear()
+        if self.browser:
+            await self.browser.close()
+
+
+async def fetch_rendered_html(url: str, pool: BrowserPool) -> str:
+    """Fetch HTML with a warm pooled page as soon as its results are rendered."""
+    page = await pool.acquire()
+    try:
+        tracker = await prepare_page(page, READINESS)
+        await pool.navigate(page, url, wait_until="domcontentloaded")
+        html = await render_html(page, tracker, pool.timings)
+    finally:
+        await pool.release(page)
+    return html
+
+
+async def render_html(page, tracker: EndpointTracker, timings: Timings) -> str:
+    """Wait until the results of a loaded page stop changing and return its HTML.
+
+    Raises ``PageNotReady`` when neither results nor an empty state showed up,
+    so a slow page is retried instead of being taken for the last one.
+    """
+    try:
+        with timings.span("readiness", url=page.url):
+            await wait_until_ready(page, READINESS, tracker, timings)
+    except (PlaywrightTimeoutError, asyncio.TimeoutError) as e:
+        raise PageNotReady(".dl-results-item-container tidak stabil dalam batas waktu") from e
+
+    with timings.span("extract", url=page.url):
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        return await page.content()
+
+
+async def fetch_page_payload(url: str, pool: BrowserPool, capture_api: bool = CAPTURE_API) -> tuple:
+    """Load one results page and return ``(kind, data, total)``.
+
+    ``kind`` is ``"records"`` (``data`` is a list) or ``"html"`` (``data``
+    is the rendered page). ``total`` is the result count reported by the
+    API, or None. With ``capture_api`` the page's XHR/fetch JSON responses
+    are recorded and mapped straight to records. The rendered DOM is only
+    serialized when the results show up on the page before any doctor
+    payload does, or when nothing shows up within ``API_TIMEOUT``.
+    """
+    if not capture_api:
+        return "html", await fetch_rendered_html(url, pool), None
+
+    page = await pool.acquire()
+    captured = []
+    found = asyncio.Event()
+    pending = set()
+
+    async def inspect(response):
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+        if "json" not in response.headers.get("content-type", ""):
+            return
+        try:
+            payload = await response.json()
+        except Exception:
+            return
+        records = records_from_api(payload)
+        if records:
+            captured.append((records, total_from_payload(payload)))
+            found.set()
+
+    def on_response(response):
+        task = asyncio.create_task(inspect(response))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    page.on("response", on_response)
+    try:
+        tracker = await prepare_page(page, READINESS)
+        await pool.navigate(page, url, wait_until="commit")
+
+        # Mana yang duluan: payload API atau hasil yang sudah stabil di DOM
+        api_ready = asyncio.create_task(found.wait())
+        dom_ready = asyncio.create_task(wait_until_ready(page, READINESS, tracker, pool.timings))
+        pending.update((api_ready, dom_ready))
+        with pool.timings.span("readiness", url=url):
+            await asyncio.wait((api_ready, dom_ready), timeout=API_TIMEOUT,
+                               return_when=asyncio.FIRST_COMPLETED)
+        if found.is_set():
+            # Respons terbesar = daftar hasil lengkap halaman ini
+            records, total = max(captured, key=lambda item: len(item[0]))
+            return "records", records, total
+
+        print(f"⚠️ Respons API tidak terlihat, fallback ke DOM: {url}")
+        if dom_ready.done() and dom_ready.exception() is None:
+            with pool.timings.span("extract", url=url):
+                return "html", await page.content(), None
+        return "html", await render_html(page, tracker, pool.timings), None
+    finally:
+        page.remove_listener("response", on_response)
+        for task in list(pending):
+            if task.done() and not task.cancelled():
+                task.exception()  # hindari warning "exception was never retrieved"
+            else:
+                task.cancel()
+        await pool.release(page)
+
+
+def records_from_payload(kind: str, data, parser: str = PARSER_BACKEND) -> list:
+    return data if kind == "records" else parse_doctor_items(data, parser)
+
+
+def normalize_records(records: list) -> list:
+    """Normalize one page of records as a batch (names, ZIP/city/country, phones)."""
+    if not records:
+        return records
+    frame = pd.DataFrame(records)
+    # Record dari HTML belum punya ZIP: semuanya dipecah dari alamat lengkap
+    has_zip = frame["zip"].fillna("") != ""
+    address = frame["address"].where(has_zip, frame["alamat lengkap"])
+    doctors = normalize_frame(frame.assign(address=address), default_country=COUNTRY)
+    frame["name"] = doctors["name"]
+    frame["address"] = doctors["street"]
+    frame["zip"] = doctors["zip"]
+    frame["city"] = doctors["city"]
+    frame["country"] = doctors["country"]
+    frame["tel"] = doctors["tel"]
+    frame["alamat lengkap"] = doctors["full_address"]
+    return frame.to_dict("records")
+
+
+class ParseStage:
+    """Parses rendered HTML in a process pool, fed through a bounded queue.
+
+    Fetchers hand HTML over with ``parse()`` and get the records back, while
+    the event loop keeps driving Playwright for the other pages. When
+    ``queue_size`` pages are already waiting for a parser, ``parse()`` blocks
+    the fetcher before it queues more, so memory stays bounded.
+    """
+
+    def __init__(self, workers: int = PARSE_WORKERS, queue_size: int = PARSE_QUEUE_SIZE,
+                 parser: str = PARSER_BACKEND):
+        self.workers = workers
+        self.parser = parser
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.executor = None
+        self.consumers = []
+
+    def start(self):
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context(PARSE_START_METHOD))
+        # Satu consumer per proses: executor tidak pernah menerima lebih dari yang bisa dikerjakan
+        self.consumers = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def parse(self, html: str) -> list:
+        result = asyncio.get_running_loop().create_future()
+        await self.queue.put((html, result))
+        return await result
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            html, result = await self.queue.get()
+            try:
+                if result.cancelled():
+                    continue  # fetcher-nya sudah dibatalkan
+                try:
+                    records = await loop.run_in_executor(self.executor, parse_doctor_items,
+                                                         html, self.parser)
+                except Exception as e:
+                    if not result.done():
+                        result.set_exception(e)
+                else:
+                    if not result.done():
+                        result.set_result(records)
+            finally:
+                self.queue.task_done()
+
+    async def close(self):
+        for consumer in self.consumers:
+            consumer.cancel()
+        await asyncio.gather(*self.consumers, return_exceptions=True)
+        while not self.queue.empty():
+            _, result = self.queue.get_nowait()
+            result.cancel()
+        if self.executor is not None:
+            await asyncio.to_thread(self.executor.shutdown, True, cancel_futures=True)
+            self.executor = None
+
+
+class PageFetcher:
+    """Turns a results URL into doctor records: page cache first, then the browser.
+
+    Without a ``pool`` (cache-only runs) a cache miss counts as an empty page.
+    HTML pages go through ``parse_stage`` when one is given, otherwise they
+    are parsed inline; every page is then normalized as one batch. Live
+    fetches are retried under ``retry``; a page that still fails raises
+    ``PageFailed``.
+    """
+
+    def __init__(self, pool: BrowserPool = None, capture_api: bool = CAPTURE_API,
+                 cache: PageCache = None, parser: str = PARSER_BACKEND,
+                 parse_stage: ParseStage = None, retry: RetryPolicy = RETRY,
+                 timings: Timings = None):
+        self.pool = pool
+        self.timings = timings or (pool.timings if pool is not None else Timings())
+        self.capture_api = capture_api
+        self.cache = cache
+        self.parser = parser
+        self.parse_stage = parse_stage
+        self.retry = retry
+
+    async def records(self, kind: str, data) -> list:
+        records = data
+        if kind == "html":
+            with self.timings.span("parse", bytes=len(data)):
+                if self.parse_stage is not None:
+                    records = await self.parse_stage.parse(data)
+                else:
+                    records = records_from_payload(kind, data, self.parser)
+        with self.timings.span("normalize", rows=len(records)):
+            # pandas per halaman makan CPU: jangan tahan event loop (fetch halaman lain)
+            return await asyncio.to_thread(normalize_records, records)
+
+    async def fetch(self, url: str) -> tuple:
+        """Return ``(records, total)``; ``total`` is the reported result count or None."""
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, url)
+            if cached is not None:
+                kind, data = cached["kind"], cached["data"]
+                return await self.records(kind, data), cached.get("total")
+        if self.pool is None:
+            return [], None
+        return await self.retry.call(self._fetch_live, url, label=url)
+
+    async def _fetch_live(self, url: str) -> tuple:
+        with self.timings.span("fetch", url=url):
+            kind, data, total = await fetch_page_payload(url, self.pool, self.capture_api)
+        records = await self.records(kind, data)
+        # Halaman kosong tidak di-cache: bisa saja hanya gagal render sesaat
+        if self.cache is not None and records:
+            await asyncio.to_thread(self.cache.put, url,
+                                    {"kind": kind, "data": data, "total": total})
+        return records, total
+
+
+def _flatten(entry: dict) -> dict:
+    """Lower-cased view of ``entry`` with nested dicts (and first list item) merged in."""
+    flat = {}
+    nested = []
+    for key, value in entry.items():
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            value = value[0]
+        if isinstance(value, dict):
+            nested.append(value)
+        else:
+            flat.setdefault(key.lower(), value)
+    # Field di level atas lebih diutamakan daripada field nested
+    for value in nested:
+        for sub_key, sub_value in _flatten(value).items():
+            flat.setdefault(sub_key, sub_value)
+    return flat
+
+
+def _api_field(flat: dict, field: str) -> str:
+    for key in API_FIELDS[field]:
+        value = flat.get(key)
+        if value not in (None, "") and not isinstance(value, (dict, list)):
+            return str(value).strip()
+    return ""
+
+
+def _api_name(flat: dict) -> str:
+    name = _api_field(flat, "name")
+    if not name:
+        name = f"{_api_field(flat, 'first_name')} {_api_field(flat, 'last_name')}".strip()
+    # "name" polos dipakai terakhir karena sering milik objek praktik/klinik
+    return name or str(flat.get("name") or "").strip()
+
+
+def _find_doctor_list(payload):
+    """Depth-first search for the first list of dicts that look like doctors."""
+    if isinstance(payload, list):
+        entries = [e for e in payload if isinstance(e, dict)]
+        if entries:
+            flat = _flatten(entries[0])
+            has_name = _api_name(flat)
+            has_place = any(_api_field(flat, f) for f in ("address1", "zip", "city", "tel"))
+            if has_name and has_place:
+                return entries
+        children = payload
+    elif isinstance(payload, dict):
+        children = payload.values()
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = _find_doctor_list(child)
+            if found:
+                return found
+    return None
+
+
+def records_from_api(payload) -> list:
+    """Map a doctor-locator JSON payload to the same records as ``parse_doctor_items``."""
+    entries = _find_doctor_list(payload) or []
+    results = []
+    for entry in entries:
+        flat = _flatten(entry)
+        results.append(make_record(
+            name=_api_name(flat),
+            address1=_api_field(flat, "address1"),
+            address2=_api_field(flat, "address2"),
+            zip_code=_api_field(flat, "zip"),
+            city=_api_field(flat, "city"),
+            country=_api_field(flat, "country"),
+            tel=_api_field(flat, "tel"),
+            site=_api_field(flat, "site"),
+        ))
+    return results
+
+
+def build_url(canton: str, page_number: int) -> str:
+    """Build the results URL for ``canton`` and a zero-based ``pr=`` page number."""
+    query_base = f"#v=results&c={canton}&cy={COUNTRY_CODE}"
+    if page_number == 0:
+        return f"{BASE_URL}{query_base}{QUERY_SUFFIX}"
+    return f"{BASE_URL}{query_base}&pr={page_number}{QUERY_SUFFIX}"
+
+
+def page_fingerprint(records: list) -> str:
+    """Identify a page by its doctors, to spot a page that repeats an earlier one."""
+    key = "|".join(f"{r['name']}/{r['tel']}" for r in records)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+async def scrape_pages_concurrent(fetcher: PageFetcher, canton: str, concurrency: int,
+                                  on_page, start_page: int = 0, on_failed=None) -> int:
+    """Fetch ``pr=`` pages of ``canton`` with ``concurrency`` workers sharing ``fetcher``.
+
+    Pages are claimed in order; the first empty page ends the crawl and any
+    page after it that is still loading gets cancelled. A page identical to
+    an earlier one (the API may ignore ``pr=``, or the site may clamp past the
+    last page) also ends the crawl. Finished pages are handed to the async
+    ``on_page(page_number, records)`` strictly in page order, as soon as all
+    pages before them are done. Crawling starts at ``start_page`` (used when
+    resuming). Returns the number of records handed over.
+
+    As soon as a page reports the total result count, no page past the one
+    that count implies is scheduled, so no trailing empty page is fetched;
+    pages already loading are still used, and a count the rows contradict is
+    dropped (see ``PageBound``). Otherwise the empty page is what ends it.
+
+    A page that raises ``PageFailed`` does not end the crawl: it is handed
+    over as an empty page, right after ``on_failed(page_number, url, error)``.
+    ``MAX_DEAD_STREAK`` failed pages in a row abort the crawl with the last
+    error.
+    """
+    ready = {}  # halaman selesai yang menunggu giliran on_page
+    fingerprints = {}  # fingerprint -> page_number pertama yang memilikinya
+    in_flight = {}  # task -> page_number
+    next_page = start_page
+    next_emit = start_page
+    emitted = 0
+    stop_at = None
+    emit_lock = asyncio.Lock()
+    dead = {}  # page_number -> (url, PageFailed), dilaporkan saat halaman itu di-emit
+    abort = None
+    bound = PageBound(first_page=0)
+    announced_end = None
+
+    def past_end(page_number):
+        if stop_at is not None and page_number >= stop_at:
+            return True
+        # Batas dari jumlah hasil hanya menghentikan penjadwalan, tidak membuang halaman
+        return bound.end is not None and page_number >= bound.end
+
+    def end_at(page_number):
+        nonlocal stop_at
+        if stop_at is None or page_number < stop_at:
+            stop_at = page_number
+        # Batalkan halaman sesudah titik berhenti yang masih dimuat
+        for other, other_page in list(in_flight.items()):
+            if other_page > stop_at:
+                other.cancel()
+
+    async def emit_ready():
+        nonlocal next_emit, emitted
+        async with emit_lock:
+            while next_emit in ready and (stop_at is None or next_emit < stop_at):
+                records = ready.pop(next_emit)
+                if next_emit in dead and on_failed is not None:
+                    on_failed(next_emit, *dead[next_emit])
+                await on_page(next_emit, records)
+                emitted += len(records)
+                next_emit += 1
+
+    async def worker():
+        nonlocal next_page, abort, announced_end
+        task = asyncio.current_task()
+        while not past_end(next_page):
+            page_number = next_page
+            next_page += 1
+            url = build_url(canton, page_number)
+
+            print(f"\n🔄 [{canton}] Scraping Page {page_number + 1}: {url}")
+            in_flight[task] = page_number
+            try:
+                parsed, total = await fetcher.fetch(url)
+            except PageFailed as e:
+                print(f"☠️ [{canton}] Page {page_number + 1} gagal: {e}")
+                dead[page_number] = (url, e)
+                ready[page_number] = []
+                # Halaman selesai tidak berurutan: cek tiap jendela yang memuat halaman ini
+                for first in range(page_number - MAX_DEAD_STREAK + 1, page_number + 1):
+                    streak = range(first, first + MAX_DEAD_STREAK)
+                    if all(n in dead for n in streak):
+                        # Situs kemungkinan sedang down: berhenti, resume mulai page berikutnya
+                        abort = e
+                        end_at(streak[-1] + 1)
+                        break
+                await emit_ready()
+                if abort is not None:
+                    return
+                continue
+            finally:
+                del in_flight[task]
+
+            if not parsed:
+                print(f"🚫 [{canton}] Tidak ada data ditemukan di page {page_number + 1}. Stop.")
+                end_at(page_number)
+                return
+
+            fingerprint = page_fingerprint(parsed)
+            first_seen = fingerprints.setdefault(fingerprint, page_number)
+            if first_seen != page_number:
+                repeat, original = max(first_seen, page_number), min(first_seen, page_number)
+                print(f"🔁 [{canton}] Page {repeat + 1} sama dengan page {original + 1}. Stop.")
+                fingerprints[fingerprint] = original
+                ready.pop(repeat, None)
+                end_at(repeat)
+                if repeat == page_number:
+                    return
+
+            # Total dari situs: jadwalkan tepat sampai page terakhir, tanpa page kosong
+            last = bound.observe(parsed, total)
+            if last is not None and last != announced_end:
+                print(f"📊 [{canton}] {bound.total} dokter, {last} page")
+            announced_end = last
+
+            print(f"✅ [{canton}] {len(parsed)} dokter ditemukan di page {page_number + 1}")
+            ready[page_number] = parsed
+            await emit_ready()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    outcomes = await asyncio.gather(*workers, return_exceptions=True)
+    for outcome in outcomes:
+        # CancelledError bukan turunan Exception, jadi halaman yang dibatalkan dilewati
+        if isinstance(outcome, Exception):
+            raise outcome
+    if abort is not None:
+        raise abort
+    return emitted
+
+
+async def scrape_canton(fetcher: PageFetcher, canton: str, on_page, concurrency: int = CONCURRENCY,
+                        start_page: int = 0, on_failed=None) -> int:
+    """Scrape every results page of one canton; each record is tagged with it.
+
+    ``concurrency=1`` walks the pages one at a time.
+    """
+    async def tag_canton(page_number, records):
+        for record in records:
+            record["canton"] = canton
+        await on_page(page_number, records)
+
+    return await scrape_pages_concurrent(fetcher, canton, max(1, concurrency), tag_canton,
+                                         start_page, on_failed)
+
+
+async def replay_dead_letters(fetcher: PageFetcher, state: CrawlState, key: str, canton: str,
+                              on_page) -> int:
+    """Fetch the dead-lettered pages of ``canton`` again; returns how many came back."""
+    recovered = 0
+    for page_number, entry in sorted(state.dead_letters(key).items()):
+        try:
+            records, _ = await fetcher.fetch(entry["url"])
+        except PageFailed as e:
+            print(f"☠️ [{canton}] Page {page_number + 1} masih gagal: {e}")
+            state.dead_letter(key, page_number, entry["url"], e.error,
+                              entry["attempts"] + e.attempts)
+            continue
+        for record in records:
+            record["canton"] = canton
+        await on_page(page_number, records)
+        state.resolve(key, page_number)
+        recovered += 1
+    return recovered
+
+
+def to_csv_row(record: dict, include_canton: bool = False) -> dict:
+    csv_row = {
+        "Name": record["name"],
+        "Address": record["address"],
+        "City": record["city"],
+        "Zip Code": record["zip"],
+        "Country": record["country"],
+        "Tel": f"'{record['tel']}",
+        "Site": record["site"],
+        "Alamat Lengkap": record["alamat lengkap"]
+    }
+    if include_canton:
+        csv_row["Canton"] = record["canton"]
+    return csv_row
+
+
+def open_sink(filename: str, fmt: str, include_canton: bool = False,
+              append: bool = False) -> RecordSink:
+    headers = CSV_HEADERS + (["Canton"] if include_canton else [])
+    return RecordSink(filename, headers, fmt=fmt, append=append)
+
+
+async def write_records(sink: RecordSink, records: list, include_canton: bool = False):
+    if sink.fmt == "csv":
+        await sink.write_rows([to_csv_row(r, include_canton) for r in records])
+    else:
+        await sink.write_rows(records)
+
+
+def to_doctors(records: list) -> list:
+    """``schema.doctor`` records of one page, for the Parquet dataset."""
+    if not records:
+        return []
+    names = split_names([record["name"] for record in records])
+    return [
+        doctor("invisalign", name=record["name"], title=title, first_name=first_name,
+               last_name=last_name, street=record["address"], zip=record["zip"],
+               city=record["city"], country=record["country"], canton=record.get("canton", ""),
+               tel=record["tel"], site=record["site"], full_address=record["alamat lengkap"])
+        for record, title, first_name, last_name in zip(
+            records, names["title"], names["first_name"], names["last_name"])
+    ]
+
+
+def output_filename(name: str, fmt: str, output_dir: str = ".") -> str:
+    return os.path.join(output_dir, f"doctors_{name}.{fmt}")
+
+
+def crawl_key(canton: str) -> str:
+    return f"invisalign:{COUNTRY_CODE}:{canton}"
+
+
+def doctor_key(record: dict) -> str:
+    return record_key(record["name"], record["zip"], record["tel"], record["country"])
+
+
+async def scrape_cantons(cantons: list, concurrency: int = CONCURRENCY,
+                         max_pages: int = MAX_OPEN_PAGES, merge: bool = False,
+                         output_dir: str = ".", fmt: str = "csv",
+                         capture_api: bool = CAPTURE_API,
+                         blocking: BlockingProfile = BLOCKING,
+                         fresh: bool = False, cache: PageCache = None,
+                         parser: str = PARSER_BACKEND,
+                         parse_workers: int = PARSE_WORKERS,
+                         proxies: ProxyPool = None, retry: RetryPolicy = RETRY,
+                         replay: bool = False, headless: bool = HEADLESS,
+                         timings: Timings = None, har: HarArchive = None,
+                         dataset: str = DATASET_DIRNAME, db: str = DB_FILENAME) -> dict:
+    """Scrape ``cantons`` on one shared browser pool; returns ``{canton: record count}``.
+
+    Records are streamed page by page to ``doctors_<canton>.<fmt>`` (with
+    ``merge``: one ``doctors_ch.<fmt>``), the Parquet ``dataset`` and the
+    SQLite ``db`` in ``output_dir``; ``None`` skips either. An interrupted
+    run resumes from ``invisalign_state.json`` unless ``fresh``, and
+    ``replay`` fetches only the dead-lettered pages again. Live runs also
+    write the delta; cache-only and HAR replay runs do not.
+    """
+    keys = [crawl_key(canton) for canton in cantons]
+    try:
+        state = open_state(os.path.join(output_dir, STATE_FILENAME), keys,
+                           cache_only=cache is not None and cache.cache_only)
+    except RuntimeError as e:
+        print(f"🛑 {e}")
+        return {}
+    resuming = replay or (not fresh and state.has_unfinished(keys))
+    if not resuming:
+        state.reset(keys)
+
+    if timings is None:
+        timings = Timings(os.path.join(output_dir, TIMINGS_FILENAME))
+    counts = {}
+    # Cache-only / replay HAR bukan listing terkini: cache miss terbaca sebagai akhir
+    # listing, jadi indeks delta & store tidak diubah
+    live = (cache is None or not cache.cache_only) and (har is None or not har.replaying)
+    delta = DeltaIndex(os.path.join(output_dir, DELTA_INDEX_FILENAME))
+    delta_writer = DeltaWriter(delta)
+    # Lintas canton hanya untuk output gabungan; tiap canton tetap lengkap
+    merged_dedup = DedupIndex() if merge else None
+    if live:
+        delta_writer.sink = RecordSink(os.path.join(output_dir, DELTA_FILENAME), fmt="jsonl",
+                                       append=resuming)
+        await asyncio.to_thread(delta_writer.sink.open)
+    parquet = None
+    if dataset:
+        parquet = open_dataset(os.path.join(output_dir, dataset), "invisalign")
+    store = DoctorStore(os.path.join(output_dir, db)) if db and live else None
+    merged_sink = None
+    if merge:
+        merged_sink = open_sink(output_filename(COUNTRY_CODE, fmt, output_dir), fmt, True,
+                                append=resuming)
+        await asyncio.to_thread(merged_sink.open)
+
+    async with AsyncExitStack() as stack:
+        # Progres ditulis di thread; pastikan perubahan terakhir sudah di disk
+        stack.push_async_callback(state.flush)
+        pool = None
+        if cache is None or not cache.cache_only:
+            playwright = await stack.enter_async_context(async_playwright())
+            session = SessionStore(os.path.join(output_dir, SESSION_FILENAME), SESSION_DOMAINS)
+            rate_limiter = None
+            if har is not None and har.replaying:
+                # Semua respons dari disk: tidak ada situs yang perlu dijaga
+                session, rate_limiter = None, DomainRateLimiter(0)
+            pool = BrowserPool(playwright, max_pages=max_pages, rate_limiter=rate_limiter,
+                               blocking=blocking, proxies=proxies, headless=headless,
+                               session=session, timings=timings, har=har)
+            await pool.start()
+        parse_stage = None
+        if parse_workers > 0:
+            parse_stage = ParseStage(parse_workers, parser=parser)
+            parse_stage.start()
+            stack.push_async_callback(parse_stage.close)
+        fetcher = PageFetcher(pool, capture_api, cache, parser, parse_stage, retry, timings)
+
+        async def run(canton):
+            key = crawl_key(canton)
+            start_page = 0
+            if replay:
+                if not state.dead_letters(key):
+                    counts[canton] = state.rows(key)
+                    return
+            elif state.is_done(key):
+                counts[canton] = state.rows(key)
+                print(f"⏭️ [{canton}] Sudah selesai di run sebelumnya ({counts[canton]} dokter)")
+                return
+            else:
+                start_page = state.next_page(key, 0)
+                if start_page:
+                    print(f"⏩ [{canton}] Melanjutkan dari page {start_page + 1}")
+            resumed = replay or start_page > 0
+            if live:
+                await asyncio.to_thread(delta.begin, key, resumed)
+            # Dokter yang sama di beberapa page canton ini (urutan hasil bisa bergeser)
+            dedup = DedupIndex()
+            stack.callback(dedup.close)
+            if resumed:
+                # Hanya run yang sedang berjalan ("current"), bukan run lengkap sebelumnya
+                written = await asyncio.to_thread(delta.keys, key)
+                dedup.update(written)
+                if merged_dedup is not None:
+                    merged_dedup.update(written)
+
+            async def crawl(sink, include_canton):
+                async def on_page(page_number, records):
+                    records = dedup.unique(records, doctor_key)
+                    with timings.span("write", canton=canton, page=page_number, rows=len(records)):
+                        if merged_dedup is not None:
+                            await write_records(sink, merged_dedup.unique(records, doctor_key),
+                                                include_canton)
+                        else:
+                            await write_records(sink, records, include_canton)
+                        doctors = to_doctors(records)
+                        if parquet is not None:
+                            await parquet.write_rows(doctors)
+                        if store is not None:
+                            await store.write_rows(doctors)
+                        await delta_writer.changes(
+                            key, [(doctor_key(record), record) for record in records])
+                        state.commit(key, page_number, records)
+
+                def on_failed(page_number, url, error):
+                    state.dead_letter(key, page_number, url, error.error, error.attempts)
+
+                if replay:
+                    recovered = await replay_dead_letters(fetcher, state, key, canton, on_page)
+                    print(f"♻️ [{canton}] {recovered} halaman gagal berhasil diambil ulang")
+                    return
+
+                await scrape_canton(fetcher, canton, on_page, concurrency, start_page, on_failed)
+                state.finish(key)
+                # Dokter "hilang" hanya bisa dipastikan kalau tidak ada halaman yang gagal
+                if not state.dead_letters(key):
+                    await delta_writer.finish(key)
+
+            if merged_sink is not None:
+                await crawl(merged_sink, include_canton=True)
+            else:
+                filename = output_filename(canton, fmt, output_dir)
+                async with open_sink(filename, fmt, append=replay or start_page > 0) as sink:
+                    await crawl(sink, include_canton=False)
+                print(f"📁 [{canton}] Data berhasil disimpan ke '{filename}'")
+            counts[canton] = state.rows(key)
+            print(f"\n✅ [{canton}] Total dokter ditemukan: {counts[canton]}")
+            if dedup.dropped:
+                print(f"🧹 [{canton}] {dedup.dropped} duplikat dibuang")
+            dead = len(state.dead_letters(key))
+            if dead:
+                print(f"☠️ [{canton}] {dead} halaman gagal, ambil ulang dengan --replay-dead")
+
+        try:
+            outcomes = await asyncio.gather(*(run(canton) for canton in cantons),
+                                            return_exceptions=True)
+        finally:
+            if pool is not None:
+                await pool.close()
+                print(pool.block_stats.summary())
+                print(pool.proxies.summary())
+                if har is not None:
+                    print(har.summary())
+            if cache is not None:
+                print(cache.summary())
+            if merged_sink is not None:
+                await asyncio.to_thread(merged_sink.close)
+            if delta_writer.sink is not None:
+                await asyncio.to_thread(delta_writer.sink.close)
+            delta.close()
+            if parquet is not None:
+                # Potongan per halaman dari run ini digabung jadi satu file per partisi
+                await asyncio.to_thread(parquet.compact)
+            if store is not None:
+                store.close()
+            if merged_dedup is not None:
+                merged_dedup.close()
+            timings.close()
+
+    # Satu canton gagal tidak menghentikan canton lain
+    for canton, outcome in zip(cantons, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"❌ [{canton}] Gagal: {outcome} (jalankan lagi untuk melanjutkan)")
+
+    if merged_sink is not None:
+        print(f"📁 {sum(counts.values())} dokter dari {len(cantons)} canton "
+              f"disimpan ke '{merged_sink.filename}'")
+        print(f"🧹 {merged_dedup.dropped} dokter yang juga terdaftar di canton lain "
+              f"hanya ditulis sekali ke file gabungan")
+    if parquet is not None:
+        print(parquet.summary())
+    if store is not None:
+        print(store.summary())
+    if delta_writer.sink is not None:
+        print(delta_writer.summary())
+    else:
+        print("🔁 Delta & database dilewati: data dari cache/HAR, bukan listing terkini")
+
+    return counts
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape invisalign.ch find-a-doctor per canton.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--canton", action="append", dest="cantons", metavar="NAME",
+                        help="canton to scrape (repeatable), e.g. --canton Vaud --canton Valais")
+    target.add_argument("--all", action="store_true", help="scrape every Swiss canton")
+    parser.add_argument("--merge", action="store_true",
+                        help="write one merged doctors_ch file instead of one file per canton")
+    parser.add_argument("--format", dest="fmt", choices=("csv", "jsonl"), default="csv",
+                        help="format of the per-canton/merged export")
+    add_output_args(parser, DATASET_DIRNAME, DB_FILENAME)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="pr= pages fetched at once per canton (1 = serial)")
+    parser.add_argument("--max-pages", type=int, default=MAX_OPEN_PAGES,
+                        help="pages open at once across all cantons")
+    parser.add_argument("--output-dir", default=".",
+                        help="directory of every output, --dataset and --db included")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--no-api", dest="capture_api", action="store_false",
+                        help="always render and parse the DOM instead of capturing the JSON API")
+    parser.add_argument("--parser", choices=BACKENDS, default=PARSER_BACKEND,
+                        help="HTML parser for DOM pages (auto = fastest installed)")
+    parser.add_argument("--parse-workers", type=int, default=PARSE_WORKERS,
+                        help="processes parsing HTML pages (0 = parse on the event loop)")
+    add_common_args(parser, RETRY)
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    cantons = CANTONS if args.all else args.cantons
+    har = har_archive(args, "invisalign")
+    cache = None
+    if har is not None:
+        # Rekaman/replay harus melewati seluruh crawl, bukan cache atau progres lama
+        args.fresh = True
+    elif not args.no_cache:
+        cache = PageCache(args.cache_dir, ttl=args.cache_ttl, cache_only=args.cache_only)
+    proxies = ProxyPool.load(args.proxies)
+    if har is not None and har.replaying:
+        proxies = ProxyPool([])
+    await scrape_cantons(cantons, concurrency=args.concurrency, max_pages=args.max_pages,
+                         merge=args.merge, output_dir=args.output_dir, fmt=args.fmt,
+                         capture_api=args.capture_api,
+                         blocking=None if args.no_block else BLOCKING,
+                         fresh=args.fresh, cache=cache, parser=args.parser,
+                         parse_workers=args.parse_workers,
+                         proxies=proxies,
+                         retry=replace(RETRY, attempts=max(1, args.retries)),
+                         replay=args.replay_dead, headless=args.headless, har=har,
+                         dataset=args.dataset, db=args.db)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+"""HTML parsers for invisalign find-a-doctor result pages.
+
+``parse_doctor_items`` has pluggable backends with one output contract:
+
+* ``selectolax`` - lexbor C parser, fastest;
+* ``lxml`` - libxml2 C parser with XPath;
+* ``bs4`` - BeautifulSoup, restricted by a SoupStrainer to the result
+  containers so headers, footers and scripts are never turned into a tree.
+
+``auto`` picks the fastest one installed. Every backend looks each field up
+once per item. This module itself only imports parsers; note that spawned
+process-pool workers still re-import the script that started them.
+"""
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:  # selectolax opsional
+    HTMLParser = None
+
+try:
+    import lxml.html
+except ImportError:  # lxml opsional
+    lxml = None
+
+ITEM_CLASS = "dl-results-item-container"
+BACKENDS = ("auto", "selectolax", "lxml", "bs4")
+
+
+def _is_item(classes) -> bool:
+    # Saat parsing, SoupStrainer memberi class sebagai string utuh ("a b"), bukan list
+    if isinstance(classes, str):
+        classes = classes.split()
+    return bool(classes) and ITEM_CLASS in classes
+
+
+def make_record(name, address1, address2, zip_code, city, country, tel, site) -> dict:
+    alamat_lengkap = f"{address1}, {address2}, {zip_code}, {city}, {country}"
+    return {
+        "name": name,
+        "address": f"{address1}, {address2}",
+        "city": city,
+        "zip": zip_code,
+        "country": country,
+        "tel": tel,
+        "site": site,
+        "alamat lengkap": alamat_lengkap
+    }
+
+
+def _record_from_fields(name: str, address_lines: list, tel: str, site: str) -> dict:
+    address1 = address_lines[0] if len(address_lines) > 0 else ""
+    address2 = address_lines[1] if len(address_lines) > 1 else ""
+    record = make_record(name, address1, address2, "", "", "", tel, site)
+    # ZIP, kota & negara dipecah per halaman di invisalign.normalize_records
+    record["alamat lengkap"] = ", ".join(address_lines)
+    return record
+
+
+def _parse_bs4(html: str) -> list:
+    # Hanya div hasil yang dibangun jadi tree
+    only_items = SoupStrainer("div", class_=_is_item)
+    soup = BeautifulSoup(html, "html.parser", parse_only=only_items)
+    results = []
+
+    for item in soup.find_all("div", class_=ITEM_CLASS):
+        name_tag = item.select_one(".dl-full-name")
+        name = name_tag.get_text(strip=True) if name_tag else ""
+
+        section = item.select_one(".dl-info-section")
+        address_divs = section.find_all("div") if section else []
+        address_lines = [div.get_text(strip=True) for div in address_divs[:3]]
+
+        tel_tag = item.select_one(".dl-phone-link")
+        tel = tel_tag.get_text(strip=True) if tel_tag else ""
+
+        site_tag = item.select_one(".dl-info-url a")
+        site = site_tag.get("href", "").strip() if site_tag else ""
+
+        results.append(_record_from_fields(name, address_lines, tel, site))
+
+    return results
+
+
+def _parse_selectolax(html: str) -> list:
+    tree = HTMLParser(html)
+    results = []
+
+    def text(node):
+        return node.text(deep=True, separator="", strip=True) if node else ""
+
+    for item in tree.css(f"div.{ITEM_CLASS}"):
+        section = item.css_first(".dl-info-section")
+        # css() lexbor ikut mencocokkan node itu sendiri, find_all bs4 tidak
+        address_divs = [div for div in section.css("div") if div != section] if section else []
+        site_tag = item.css_first(".dl-info-url a")
+        site = (site_tag.attributes.get("href") or "").strip() if site_tag else ""
+
+        results.append(_record_from_fields(
+            text(item.css_first(".dl-full-name")),
+            [text(div) for div in address_divs[:3]],
+            text(item.css_first(".dl-phone-link")),
+            site,
+        ))
+
+    return results
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_XPATH_ITEMS = f"//div[{_has_class(ITEM_CLASS)}]"
+_XPATH_NAME = f".//*[{_has_class('dl-full-name')}]"
+_XPATH_SECTION = f".//*[{_has_class('dl-info-section')}]"
+_XPATH_TEL = f".//*[{_has_class('dl-phone-link')}]"
+_XPATH_SITE = f".//*[{_has_class('dl-info-url')}]//a"
+
+
+def _parse_lxml(html: str) -> list:
+    if not html.strip():
+        return []
+    doc = lxml.html.fromstring(html)
+    results = []
+
+    def first(node, xpath):
+        found = node.xpath(xpath)
+        return found[0] if found else None
+
+    def text(node):
+        # text() tidak ikut komentar, sama seperti get_text(strip=True) di bs4
+        return "".join(t.strip() for t in node.xpath(".//text()")) if node is not None else ""
+
+    for item in doc.xpath(_XPATH_ITEMS):
+        section = first(item, _XPATH_SECTION)
+        address_divs = section.xpath(".//div") if section is not None else []
+        site_tag = first(item, _XPATH_SITE)
+        site = (site_tag.get("href") or "").strip() if site_tag is not None else ""
+
+        results.append(_record_from_fields(
+            text(first(item, _XPATH_NAME)),
+            [text(div) for div in address_divs[:3]],
+            text(first(item, _XPATH_TEL)),
+            site,
+        ))
+
+    return results
+
+
+def resolve_backend(backend: str = "auto") -> str:
+    if backend == "auto":
+        if HTMLParser is not None:
+            return "selectolax"
+        if lxml is not None:
+            return "lxml"
+        return "bs4"
+    if backend == "selectolax" and HTMLParser is None:
+        raise ImportError("backend 'selectolax' butuh paket selectolax")
+    if backend == "lxml" and lxml is None:
+        raise ImportError("backend 'lxml' butuh paket lxml")
+    if backend not in BACKENDS:
+        raise ValueError(f"backend parser tidak dikenal: {backend!r}")
+    return backend
+
+
+_PARSERS = {"selectolax": _parse_selectolax, "lxml": _parse_lxml, "bs4": _parse_bs4}
+
+
+def parse_doctor_items(html: str, backend: str = "auto") -> list:
+    """Parse every ``.dl-results-item-container`` of a results page into records."""
+    return _PARSERS[resolve_backend(backend)](html)
@@ -0,0 +1,65 @@
+"""Parity of the invisalign parser backends against the BeautifulSoup baseline.
+
+Runs a saved results page through every installed backend and requires
+records identical to the ``bs4`` parse; backends that are not installed are
+skipped::
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "invisalign"))
+
+pytest.importorskip("bs4")
+import parsers  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "invisalign_results.html")
+BACKEND_MODULES = {"selectolax": "selectolax.lexbor", "lxml": "lxml.html"}
+
+
+@pytest.fixture(scope="module")
+def html():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.fixture(scope="module")
+def baseline(html):
+    return parsers.parse_doctor_items(html, backend="bs4")
+
+
+def test_baseline_reads_every_result(baseline):
+    # Header, footer & script di luar kartu hasil tidak boleh ikut
+    assert [record["name"] for record in baseline] == [
+        "Dr. Élise   Müller-Beck", "HansMeier", "Orthodontie & Co", ""]
+    assert baseline[0]["alamat lengkap"] == \
+        "CabinetDentairedu Lac, Rue du Rhône 12, 1204, Genève, Switzerland"
+    assert baseline[0]["tel"] == "+41 22 123 45 67"
+    assert baseline[0]["site"] == "https://cabinet-du-lac.ch/"
+    assert baseline[1]["alamat lengkap"] == "Bahnhofstrasse 1, , 1003, Lausanne, Switzerland"
+    assert baseline[2]["site"] == ""
+    assert baseline[3]["alamat lengkap"] == ""
+
+
+@pytest.mark.parametrize("backend", sorted(BACKEND_MODULES))
+def test_backend_matches_bs4(backend, html, baseline):
+    pytest.importorskip(BACKEND_MODULES[backend])
+    assert parsers.parse_doctor_items(html, backend=backend) == baseline
+
+
+def test_empty_page_has_no_records():
+    for backend in parsers.BACKENDS:
+        try:
+            assert parsers.parse_doctor_items("", backend=backend) == []
+        except ImportError:
+            continue  # backend tidak terpasang
+
+
+def test_auto_picks_an_installed_backend():
+    assert parsers.resolve_backend("auto") in parsers.BACKENDS[1:]
+    with pytest.raises(ValueError):
+        parsers.resolve_backend("html5lib")
@@ -0,0 +1,98 @@
+"""ProxyPool driven through local mock proxies (common.mockproxy).
+
+Requests go through ``MockProxy`` instances to a local upstream server and
+their outcome is reported to the pool, as ``BrowserPool.navigate`` does::
+
+    python -m pytest tests
+"""
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.mockproxy import MockProxy  # noqa: E402
+from common.proxies import LATENCY_WEIGHT, ProxyPool, is_ban_status  # noqa: E402
+
+
+async def _upstream(reader, writer):
+    await reader.readuntil(b"\r\n\r\n")
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+    await writer.drain()
+    writer.close()
+
+
+async def _get(proxy, url: str) -> int:
+    """Status of a plain HTTP GET of ``url`` through ``proxy`` (a ``Proxy``)."""
+    host, port = proxy.server.rsplit("//", 1)[1].split(":")
+    reader, writer = await asyncio.open_connection(host, int(port))
+    writer.write(f"GET {url} HTTP/1.1\r\nHost: upstream\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def _navigate(pool: ProxyPool, session, url: str) -> int:
+    proxy = pool.pick(session)
+    started = time.monotonic()
+    status = await _get(proxy, url)
+    banned = is_ban_status(status)
+    pool.report(proxy, ok=not banned, latency=time.monotonic() - started, banned=banned)
+    if banned:
+        pool.rotate(session)
+    return status
+
+
+@pytest.mark.parametrize("ban_status", [403, 429])
+def test_banned_proxy_cools_down_and_session_rotates(ban_status):
+    async def run():
+        server = await asyncio.start_server(_upstream, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+        async with MockProxy(ban_rate=1.0, ban_status=ban_status) as bad, \
+                MockProxy() as good:
+            pool = ProxyPool.from_urls([bad.url, good.url], cooldown=60)
+            # Sesi yang mulai di proxy yang di-ban
+            pool.sessions["s"] = pool.proxies[0]
+            statuses = [await _navigate(pool, "s", url) for _ in range(3)]
+        server.close()
+        return pool, statuses, bad, good
+
+    pool, statuses, bad, good = asyncio.run(run())
+    assert statuses == [ban_status, 200, 200]
+    assert bad.banned == 1 and good.requests == 2
+    banned, healthy = pool.proxies
+    assert banned.bans == 1 and not banned.available()
+    assert pool.sessions["s"] is healthy and pool.rotations == 1
+    assert pool.healthy() == [healthy]
+
+
+def test_latency_is_an_ewma():
+    async def run():
+        server = await asyncio.start_server(_upstream, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+        async with MockProxy(delay=0.2) as proxy:
+            pool = ProxyPool.from_urls([proxy.url])
+            await _navigate(pool, "s", url)
+            slow = pool.proxies[0].latency
+            proxy.delay = 0.0
+            await _navigate(pool, "s", url)
+        server.close()
+        return slow, pool.proxies[0].latency
+
+    slow, mixed = asyncio.run(run())
+    assert slow >= 0.2
+    # Sampel baru hanya berbobot LATENCY_WEIGHT: latency turun, tapi tidak langsung
+    assert (1 - LATENCY_WEIGHT) * slow <= mixed < slow
+
+
+def test_sessions_spread_over_free_proxies():
+    pool = ProxyPool.from_urls(["http://127.0.0.1:1", "http://127.0.0.1:2",
+                                "http://127.0.0.1:3"])
+    picked = [pool.pick(lane) for lane in range(3)]
+    assert len({id(proxy) for proxy in picked}) == 3
+    # Sticky: sesi yang sama tetap di proxy-nya
+    assert [pool.pick(lane) for lane in range(3)] == picked